@@ -1,14 +1,32 @@
 import ctypes
+import queue
+import threading
+import time
 from comtypes import CLSCTX_ALL, GUID, IUnknown, COMMETHOD, HRESULT
 from comtypes import client as com_client
 from pycaw.pycaw import AudioUtilities
 import comtypes
+try: from pycaw.callbacks import MMNotificationClient
+except ImportError: MMNotificationClient = None  # Older pycaw: fall back to rescanning on a miss
+
+import config
+import diagnostics
+
+if MMNotificationClient:
+    class DeviceWatcher(MMNotificationClient):
+        """ Forwards endpoint add/remove/state changes to a plain callback. """
+        def __init__(self, callback):
+            super().__init__()
+            self.callback = callback
+        def on_device_state_changed(self, *args): self.callback()
+        def on_device_added(self, *args): self.callback()
+        def on_device_removed(self, *args): self.callback()
 
 class AudioSwitcher:
     def __init__(self):
         try:
             comtypes.CoInitialize()
-        except: pass
+        except Exception: diagnostics.swallowed("audio.CoInitialize")
         self.policy_config = self._get_policy_config()
 
     def _get_policy_config(self):
@@ -30,11 +48,13 @@ class AudioSwitcher:
                 ]
             CLSID_PolicyConfig = GUID('{870af99c-171d-4f9e-af0d-e63df40c2bc9}')
             return com_client.CreateObject(CLSID_PolicyConfig, interface=IPolicyConfig)
-        except Exception as e:
+        except Exception:
+            diagnostics.swallowed("audio.policy_config")
             return None
 
     def get_devices(self):
         devs = []
+        started = time.perf_counter()
         try:
             device_enumerator = AudioUtilities.GetDeviceEnumerator()
             collection = device_enumerator.EnumAudioEndpoints(0, 1) # 0=Render, 1=Active
@@ -43,19 +63,132 @@ class AudioSwitcher:
                 raw_dev = collection.Item(i)
                 device = AudioUtilities.CreateDevice(raw_dev)
                 devs.append({'name': device.FriendlyName, 'id': device.id})
-        except: pass
+        except Exception: diagnostics.swallowed("audio.get_devices")
+        diagnostics.slow("audio.get_devices", started)
         return devs
 
     def get_current_device_id(self):
+        started = time.perf_counter()
         try:
             device_enumerator = AudioUtilities.GetDeviceEnumerator()
             current = device_enumerator.GetDefaultAudioEndpoint(0, 1) # 0=Render, 1=Console
             return current.GetId()
-        except: return None
+        except Exception:
+            diagnostics.swallowed("audio.get_current_device_id")
+            return None
+        finally: diagnostics.slow("audio.get_current_device_id", started)
 
     def set_default_device(self, device_id):
-        if not self.policy_config: return
+        """ Returns True when the device became the default for both console and communications. """
+        if not self.policy_config: return False
+        started = time.perf_counter()
         try:
             self.policy_config.SetDefaultEndpoint(device_id, 0)
             self.policy_config.SetDefaultEndpoint(device_id, 2)
-        except: pass
\ No newline at end of file
+            return True
+        except Exception:
+            diagnostics.swallowed("audio.set_default_device")
+            return False
+        finally: diagnostics.slow("audio.set_default_device", started)
+
+    def watch(self, callback):
+        """ Calls callback (on a COM thread) whenever an output device is added, removed or changes state. """
+        if not MMNotificationClient: return False
+        try:
+            self.watcher = DeviceWatcher(callback)
+            self.enumerator = AudioUtilities.GetDeviceEnumerator()
+            self.enumerator.RegisterEndpointNotificationCallback(self.watcher)
+            return True
+        except Exception:
+            diagnostics.swallowed("audio.watch")
+            return False
+
+class AudioWorker:
+    """ Runs an AudioSwitcher on its own thread (COM objects stay in the apartment that made them)
+    and keeps an in-memory device table so hotkeys never wait on a full enumeration. The table is
+    rebuilt when Windows reports a device change or a switch fails, never on an ordinary press. """
+    def __init__(self, switcher_factory=AudioSwitcher):
+        self.switcher_factory = switcher_factory
+        self.jobs = queue.Queue()
+        self.devices = []
+        self.watching = False
+        self.stale = False
+        self.refreshed_at = 0.0
+        threading.Thread(target=self._run, daemon=True).start()
+        self.submit(self._refresh)
+
+    def _run(self):
+        self.switcher = self.switcher_factory()
+        watch = getattr(self.switcher, 'watch', None)
+        self.watching = bool(watch and watch(self._devices_changed))
+        while True:
+            fn, done = self.jobs.get()
+            try: result = fn()
+            except Exception:
+                diagnostics.swallowed("audio.worker_job")
+                result = None
+            if done:
+                try: done(result)
+                except Exception: diagnostics.swallowed("audio.worker_done")
+
+    def submit(self, fn, done=None): self.jobs.put((fn, done))
+
+    def _refresh(self):
+        self.stale = False
+        self.refreshed_at = time.monotonic()
+        self.devices = self.switcher.get_devices()
+        return self.devices
+
+    def _devices_changed(self):
+        # A plug/unplug fires several notifications; queue one rebuild for the burst
+        if self.stale: return
+        self.stale = True
+        self.submit(lambda: self.stale and self._refresh())
+
+    def refresh(self, done=None): self.submit(self._refresh, done)
+
+    def menu_items(self, done):
+        """ done receives (devices, current default id) for the device menu, from the cached table. """
+        def job():
+            if not self.devices or self.stale: self._refresh()
+            return self.devices, self.switcher.get_current_device_id()
+        self.submit(job, done)
+
+    def _find(self, match):
+        match = match.lower()
+        for dev in self.devices:
+            if dev['id'].lower() == match or match in dev['name'].lower(): return dev
+        return None
+
+    def _resolve(self, match):
+        dev = self._find(match)
+        if dev is None and not self.watching and time.monotonic() - self.refreshed_at > config.AUDIO_RESCAN_INTERVAL:
+            self._refresh()  # No change notifications: the device may have been plugged in since the last scan
+            dev = self._find(match)
+        return dev
+
+    def _set(self, dev):
+        """ Switches to dev; a failure usually means the table is out of date, so rebuild it. """
+        if self.switcher.set_default_device(dev['id']): return dev
+        self._refresh()
+        return None
+
+    def switch_to(self, match, done=None):
+        """ Makes the first device whose name contains match (or whose id equals it) the default;
+        done receives the device, or None when nothing matched or the switch failed. """
+        def job():
+            dev = self._resolve(match)
+            return self._set(dev) if dev else None
+        self.submit(job, done)
+
+    def cycle(self, matches=None, done=None):
+        """ Steps to the next preset (or next device when no presets are given) after the current default. """
+        def job():
+            if not self.devices: self._refresh()
+            targets = [d for d in (self._resolve(m) for m in matches) if d] if matches else list(self.devices)
+            if not targets: return None
+            current = self.switcher.get_current_device_id()
+            ids = [d['id'] for d in targets]
+            dev = targets[(ids.index(current) + 1) % len(targets)] if current in ids else targets[0]
+            return self._set(dev)
+        self.submit(job, done)
@@ -0,0 +1,143 @@
+""" Micro-benchmarks for the pad's hot paths. Run: python benchmarks.py [name ...] """
+import os
+import sys
+import tempfile
+import time
+
+import config
+
+def percentile(samples, p):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(len(s) * p))]
+
+def report(name, samples_s, unit="us"):
+    scale = 1e6 if unit == "us" else 1e3
+    print(f"{name:<32} n={len(samples_s):<6} mean={sum(samples_s) / len(samples_s) * scale:8.2f}{unit} "
+          f"p50={percentile(samples_s, 0.5) * scale:8.2f}{unit} p99={percentile(samples_s, 0.99) * scale:8.2f}{unit} "
+          f"max={max(samples_s) * scale:8.2f}{unit}")
+
+def bench_word_index():
+    """ Cost of one keystroke: narrow the range, then rank suggestions. """
+    from word_index import WordIndex, Completer
+    index_file = os.path.join(tempfile.mkdtemp(), "bench_words.idx")
+    index = WordIndex.load(config.WORDS_FILE, index_file)
+    words = [index.word(i) for i in range(index.n)]
+    completer = Completer(index, max_learned=config.MAX_LEARNED_WORDS)
+    push, lookup = [], []
+    clock = time.perf_counter
+    for _ in range(5):
+        for w in words:
+            for ch in w:
+                t0 = clock(); completer.push(ch); t1 = clock()
+                completer.suggestions(); t2 = clock()
+                push.append(t1 - t0); lookup.append(t2 - t1)
+            completer.commit()
+    report("word_index.push", push)
+    report("word_index.suggestions", lookup)
+    index.close()
+
+def bench_emoji_search():
+    """ Per-keystroke search cost while typing emoji queries. """
+    from emoji_index import EmojiIndex
+    index = EmojiIndex.build()
+    queries = ["smile", "heart", "thumbs up", "fire", "face with", "cat", "party", "rocket"]
+    samples = []
+    for _ in range(20):
+        for q in queries:
+            for n in range(1, len(q) + 1):
+                t0 = time.perf_counter(); index.search(q[:n]); samples.append(time.perf_counter() - t0)
+    report("emoji_index.search", samples)
+
+def bench_macro_jitter():
+    """ Timing error of a 60-step macro with 15 ms gaps, run on the real Tk loop. """
+    import tkinter as tk
+    from macros import compile_macro, MacroRunner
+    from scheduler import Scheduler
+    from session_replay import FakeInjector
+    try: root = tk.Tk()
+    except tk.TclError as e:
+        print(f"{'macro.jitter':<32} skipped ({e})"); return
+    root.withdraw()
+    runner = MacroRunner(Scheduler(root), FakeInjector())
+    actions = compile_macro(["key:a", "delay:15"] * 60)
+    samples = []
+    def next_run(left):
+        samples.extend(runner.jitter)
+        if left: runner.run(actions, on_done=lambda: root.after(20, next_run, left - 1))
+        else: root.quit()
+    root.after(50, next_run, 5)
+    root.mainloop()
+    root.destroy()
+    report("macro.jitter", [abs(j) for j in samples], unit="ms")
+
+def bench_pads():
+    """ Startup time and Python heap cost of the runtime with its first pad, then of each pad added to it. """
+    import tracemalloc
+    from session_replay import FakeInjector, FakeAudio
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        from main import Runtime
+        runtime = Runtime(injector=FakeInjector(), audio_switcher=FakeAudio(), background=False, persist=False)
+    except Exception as e:
+        tracemalloc.stop()
+        print(f"{'pads':<32} skipped ({e!r})"); return
+    runtime.root.update()
+    startup, heap = time.perf_counter() - t0, tracemalloc.get_traced_memory()[0]
+    commands = len(runtime.root.tk.splitlist(runtime.root.tk.call('info', 'commands')))
+    print(f"{'pads.first (with runtime)':<32} {startup * 1000:8.1f}ms {heap / 1024:9.0f}KiB heap {commands:6d} tcl cmds")
+    for n in range(2, 6):
+        t0 = time.perf_counter()
+        runtime.add_pad()
+        runtime.root.update()
+        startup, now = time.perf_counter() - t0, tracemalloc.get_traced_memory()[0]
+        total = len(runtime.root.tk.splitlist(runtime.root.tk.call('info', 'commands')))
+        print(f"{f'pads.add #{n}':<32} {startup * 1000:8.1f}ms {(now - heap) / 1024:+9.0f}KiB heap {total - commands:+6d} tcl cmds")
+        heap, commands = now, total
+    tracemalloc.stop()
+    runtime.root.destroy()
+
+def bench_scroll():
+    """ Wheel handling at a high event rate: hit-testing against the cached rectangles versus the
+    per-event Tk geometry queries it replaced. """
+    from session_replay import FakeInjector, FakeAudio, FakeEvent
+    try:
+        from main import Runtime
+        runtime = Runtime(injector=FakeInjector(), audio_switcher=FakeAudio(), background=False, persist=False)
+    except Exception as e:
+        print(f"{'scroll':<32} skipped ({e!r})"); return
+    pad = runtime.pads[0]
+    pad.undock_window()
+    pad.root.update()
+    wx, wy = pad.geo['window'][:2]
+    mx, my, mw, mh = pad.geo['media']
+    inside = FakeEvent(wx + mx + mw // 2, wy + my + mh // 2, 120)
+    outside = FakeEvent(wx + mx + mw // 2, wy + my + mh + 20, -120)
+    handled, missed, keys, queries = [], [], [], []
+    clock = time.perf_counter
+    for i in range(2000):
+        t0 = clock(); pad.on_mouse_scroll(inside); t1 = clock(); pad.on_mouse_scroll(outside); t2 = clock()
+        pad.key_at(outside.x_root, outside.y_root); t3 = clock()
+        handled.append(t1 - t0); missed.append(t2 - t1); keys.append(t3 - t2)
+        t0 = clock()
+        pad.root.winfo_pointerxy(); pad.media_frame.winfo_rootx(); pad.media_frame.winfo_rooty()
+        pad.media_frame.winfo_width(); pad.media_frame.winfo_height()
+        queries.append(clock() - t0)
+        if i % 100 == 0: pad.root.update()
+    report("scroll.hit (volume step)", handled)
+    report("scroll.miss", missed)
+    report("scroll.key_at (cached rects)", keys)
+    report("scroll.winfo_queries (old)", queries)
+    runtime.root.destroy()
+
+BENCHMARKS = {
+    "words": bench_word_index,
+    "emoji": bench_emoji_search,
+    "macro": bench_macro_jitter,
+    "pads": bench_pads,
+    "scroll": bench_scroll,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names: BENCHMARKS[name]()
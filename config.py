@@ -3,12 +3,43 @@ import os
 
 # --- Constants ---
 CONFIG_FILE = "floatpad_config.json"
+LAYOUT_CACHE_FILE = "floatpad_layouts.cache"
+LAYOUT_DIR = "layouts"
+EMOJI_INDEX_FILE = "floatpad_emoji.idx"
+MAX_RECENT_EMOJI = 16
+WORDS_FILE = "words.txt"
+WORD_INDEX_FILE = "floatpad_words.idx"
+MAX_LEARNED_WORDS = 500
+DIAG_CAPACITY = 512
+DIAG_SLOW_CALL = 0.05
+DIAG_DUMP_FILE = "floatpad_diagnostics.txt"
+SESSION_FILE_PATTERN = "floatpad_session_%Y%m%d_%H%M%S.fps"
+DEFAULT_LAYOUTS = ["numpad", "alpha"]
 DEFAULT_WIDTH = 300
 DEFAULT_HEIGHT = 360
 MIN_WIDTH = 220
 MIN_HEIGHT = 350
 SNAP_THRESHOLD = 75
 
+# --- Key Timing (seconds) ---
+REPEAT_DELAY = 0.3
+REPEAT_INTERVAL = 0.1
+REPEAT_MIN_INTERVAL = 0.035
+REPEAT_ACCEL = 0.94
+LONG_PRESS_DELAY = 0.4
+
+# --- Motion Budget ---
+MOTION_OVERRUN = 0.012      # A frame landing this much later than scheduled counts as an overrun
+MOTION_DEGRADE_AT = 0.4     # Smoothed overrun fraction that drops one motion level
+MOTION_RESTORE_AT = 0.05    # ...and the fraction below which one level comes back
+MOTION_PROBE_EVERY = 20     # While off, retry a reduced animation every N skipped ones
+
+# --- Audio ---
+AUDIO_RESCAN_INTERVAL = 5.0 # Without device-change notifications, rescan on a preset miss at most this often
+
+# --- Performance HUD ---
+HUD_INTERVAL = 0.5          # Seconds between refreshes; also the timer whose lateness is shown as loop lag
+
 # --- Colors ---
 BG_COLOR = "#1e1e1e"
 TITLE_BG = "#252526"
@@ -19,8 +50,11 @@ TXT_COLOR = "#ffffff"
 
 def load_config():
     if os.path.exists(CONFIG_FILE):
-        try: return json.load(open(CONFIG_FILE))
-        except: pass
+        try:
+            with open(CONFIG_FILE) as f: return json.load(f)
+        except Exception:
+            import diagnostics  # Imported lazily; diagnostics itself depends on config
+            diagnostics.swallowed("config.load_config")
     return {}
 
 def save_config_file(data):
@@ -0,0 +1,79 @@
+""" Fixed-size ring buffer of swallowed exceptions and slow platform calls.
+Cheap enough to stay on in production: recording is a few slot writes into preallocated arrays. """
+import sys
+import threading
+import time
+from array import array
+
+import config
+
+CAPACITY = config.DIAG_CAPACITY
+SLOW_CALL = config.DIAG_SLOW_CALL
+
+_sites = [None] * CAPACITY
+_kinds = [None] * CAPACITY
+_durations = array('d', bytes(8 * CAPACITY))
+_stamps = array('d', bytes(8 * CAPACITY))
+_pos = 0
+_total = 0
+counters = {}  # site -> [swallowed exceptions, slow calls]
+latest = {}    # site -> duration of the most recent timed call, slow or not
+sections = {}  # name -> callable returning {label: value}, appended to dumps
+# Tk, the audio worker, the timer and the keyboard hook all record; an uncontended lock costs well under a microsecond
+_lock = threading.Lock()
+
+def _put(site, kind, duration, counter):
+    """ Caller holds _lock. """
+    global _pos, _total
+    i = _pos
+    _sites[i] = site; _kinds[i] = kind
+    _durations[i] = duration; _stamps[i] = time.time()
+    _pos = (i + 1) % CAPACITY
+    _total += 1
+    c = counters.get(site)
+    if c is None: c = counters[site] = [0, 0]
+    c[counter] += 1
+
+def swallowed(site):
+    """ Call from inside an except block in place of `pass`; records the active exception type. """
+    exc = sys.exc_info()[0]
+    with _lock: _put(site, exc.__name__ if exc else "?", 0.0, 0)
+
+def slow(site, started):
+    """ `started` is a perf_counter() taken before the call; only calls over the threshold are kept. """
+    duration = time.perf_counter() - started
+    latest[site] = duration
+    if duration >= SLOW_CALL:
+        with _lock: _put(site, "slow", duration, 1)
+    return duration
+
+def entries():
+    """ Oldest-first list of (timestamp, site, kind, duration_s). """
+    with _lock:
+        n = min(_total, CAPACITY)
+        start = (_pos - n) % CAPACITY
+        return [(_stamps[j], _sites[j], _kinds[j], _durations[j])
+                for j in ((start + k) % CAPACITY for k in range(n))]
+
+def dump():
+    lines = [f"FloatPad diagnostics  {time.strftime('%Y-%m-%d %H:%M:%S')}",
+             f"events recorded: {_total} (last {min(_total, CAPACITY)} kept)", "", "[counters] site: swallowed / slow"]
+    with _lock: snapshot = {site: tuple(c) for site, c in counters.items()}
+    for site in sorted(snapshot):
+        exc, slow_calls = snapshot[site]
+        lines.append(f"  {site}: {exc} / {slow_calls}")
+    for name in sorted(sections):
+        lines += ["", f"[{name}]"]
+        try:
+            for key, value in sections[name]().items(): lines.append(f"  {key}: {value}")
+        except Exception as e: lines.append(f"  unavailable: {e!r}")
+    lines += ["", "[recent]"]
+    for stamp, site, kind, duration in entries():
+        when = time.strftime('%H:%M:%S', time.localtime(stamp))
+        extra = f" {duration * 1000:.1f}ms" if kind == "slow" else ""
+        lines.append(f"  {when} {site} {kind}{extra}")
+    return "\n".join(lines)
+
+def write_dump(path):
+    with open(path, 'w', encoding='utf-8') as f: f.write(dump())
+    return path
@@ -0,0 +1,97 @@
+import bisect
+import json
+import os
+import unicodedata
+from array import array
+
+import diagnostics
+
+# Codepoint blocks that hold the pictographic emoji. Names come from the bundled
+# unicodedata tables, so no emoji database has to ship with the app.
+EMOJI_RANGES = [
+    (0x1F300, 0x1F5FF), (0x1F600, 0x1F64F), (0x1F680, 0x1F6FF),
+    (0x1F900, 0x1F9FF), (0x1FA70, 0x1FAFF), (0x2600, 0x26FF), (0x2700, 0x27BF),
+]
+
+# Common search words that do not appear in the Unicode names.
+EXTRA_KEYWORDS = {
+    '😂': 'lol laugh haha', '🤣': 'lol laugh rofl', '😊': 'happy blush', '😍': 'love crush',
+    '😘': 'kiss love', '😢': 'sad tear', '😭': 'sad sob', '😡': 'angry mad', '🤔': 'hmm think',
+    '👍': 'like yes ok approve', '👎': 'dislike no', '👏': 'clap bravo', '🙏': 'please thanks pray',
+    '🔥': 'fire lit hot', '🎉': 'party celebrate tada', '💯': 'hundred perfect', '✅': 'done check yes',
+    '❌': 'no cross wrong', '🚀': 'launch ship rocket', '👀': 'look eyes see', '💀': 'dead skull',
+    '🙄': 'eyeroll', '😎': 'cool', '🥳': 'party birthday', '🤝': 'deal agree handshake',
+}
+
+INDEX_VERSION = 1
+
+class EmojiIndex:
+    """ Sorted term array with parallel postings; prefix search is two bisects and a slice. """
+    def __init__(self, glyphs, names, terms, postings):
+        self.glyphs = glyphs
+        self.names = names
+        self.terms = terms
+        self.postings = postings
+        self.all_ids = tuple(range(len(glyphs)))
+        self._last_query = None
+        self._last_result = self.all_ids
+
+    @classmethod
+    def build(cls):
+        glyphs, names, pairs = [], [], []
+        for lo, hi in EMOJI_RANGES:
+            for cp in range(lo, hi + 1):
+                ch = chr(cp)
+                name = unicodedata.name(ch, None)
+                if not name: continue
+                idx = len(glyphs)
+                words = set(name.lower().replace('-', ' ').split())
+                words.update(EXTRA_KEYWORDS.get(ch, '').split())
+                if cp < 0x1F000: ch += '\ufe0f'  # Ask for emoji presentation of the older symbols
+                glyphs.append(ch); names.append(name.lower())
+                for w in words: pairs.append((w, idx))
+        pairs.sort()
+        return cls(glyphs, names, [t for t, _ in pairs], array('H', (i for _, i in pairs)))
+
+    @classmethod
+    def load(cls, cache_file):
+        """ Loads the prebuilt index from disk, rebuilding it when the Unicode tables change. """
+        stamp = [INDEX_VERSION, unicodedata.unidata_version]
+        if os.path.exists(cache_file):
+            # Plain JSON: whoever can write this file must not get to run code at startup
+            try:
+                with open(cache_file, encoding='utf-8') as f: data = json.load(f)
+                if data['stamp'] == stamp:
+                    return cls(data['glyphs'], data['names'], data['terms'], array('H', data['postings']))
+            except Exception: diagnostics.swallowed("emoji_index.load")  # Corrupt cache: rebuild it
+        index = cls.build()
+        try:
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'stamp': stamp, 'glyphs': index.glyphs, 'names': index.names, 'terms': index.terms,
+                           'postings': index.postings.tolist()}, f, separators=(',', ':'))
+        except OSError: diagnostics.swallowed("emoji_index.save")
+        return index
+
+    def _prefix(self, word):
+        lo = bisect.bisect_left(self.terms, word)
+        hi = bisect.bisect_left(self.terms, word + '\uffff', lo)
+        return self.postings[lo:hi]
+
+    def search(self, query):
+        """ Returns emoji ids whose name words start with every word of the query. """
+        words = query.lower().split()
+        if not words: return self.all_ids
+        if query == self._last_query: return self._last_result
+        result = None
+        for word in words:
+            ids = self._prefix(word)
+            if result is None: result = dict.fromkeys(sorted(ids))
+            else:
+                keep = set(ids)
+                result = {i: None for i in result if i in keep}
+            if not result: break
+        self._last_query, self._last_result = query, tuple(result)
+        return self._last_result
+
+    def glyph(self, idx): return self.glyphs[idx]
+    def name(self, idx): return self.names[idx]
@@ -0,0 +1,29 @@
+import time
+
+import pyautogui
+import keyboard
+
+import diagnostics
+
+class Injector:
+    """ Sends synthetic input to whichever window has focus. """
+    def press(self, key):
+        started = time.perf_counter()
+        pyautogui.press(key)
+        diagnostics.slow("inject.press", started)
+
+    def hotkey(self, *keys):
+        started = time.perf_counter()
+        pyautogui.hotkey(*keys)
+        diagnostics.slow("inject.hotkey", started)
+
+    def write(self, text):
+        started = time.perf_counter()
+        if text.isascii(): pyautogui.write(text)
+        else: keyboard.write(text)  # pyautogui can only type what the keyboard layout has keys for
+        diagnostics.slow("inject.write", started)
+
+    def send(self, combo):
+        started = time.perf_counter()
+        keyboard.send(combo)
+        diagnostics.slow("inject.send", started)
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import diagnostics
+
+# --- Compiled Layout Model ---
+# Actions are pre-parsed into (kind, arg) tuples so the UI never touches strings at runtime.
+Key = namedtuple('Key', 'label icon row col rowspan colspan tap repeat hold accelerate font_size rect')
+Layout = namedtuple('Layout', 'name kind size font pad cols rows col_weights row_weights keys digest')
+
+MODEL_VERSION = b'2'  # Bump when Key/Layout change shape so stale disk caches are ignored
+ACTION_KINDS = ('key', 'hotkey', 'text', 'letter', 'upper', 'shift', 'caps')
+
+def parse_action(spec):
+    """ 'key:enter' -> ('key', 'enter'), 'hotkey:shift+enter' -> ('hotkey', ('shift', 'enter')) """
+    kind, _, arg = spec.partition(':')
+    if kind not in ACTION_KINDS: raise ValueError(f"Unknown layout action: {spec!r}")
+    if kind == 'hotkey': return (kind, tuple(arg.split('+')))
+    return (kind, arg or None)
+
+def _expand_key(item, default):
+    if isinstance(item, str): item = {'label': item}
+    item = dict(item)
+    label = item.get('label', '')
+    if 'tap' not in item:
+        item['tap'] = f"{default}:{label}"
+        if default == 'letter' and 'hold' not in item: item['hold'] = f"upper:{label}"
+    return item
+
+def compile_layout(data, digest=None):
+    """ Turns a parsed layout file into an immutable Layout with grid weights and hit rectangles. """
+    default = data.get('default', 'key')
+    font = tuple(data.get('font', ("Segoe UI", 11)))
+    occupied = set()
+    placed = []
+    for r, row in enumerate(data['rows']):
+        row_default = default
+        if isinstance(row, dict): row_default = row.get('default', default); row = row['keys']
+        c = 0
+        for item in row:
+            item = _expand_key(item, row_default)
+            while (r, c) in occupied: c += 1
+            colspan = item.get('span', 1); rowspan = item.get('rowspan', 1)
+            for dr in range(rowspan):
+                for dc in range(colspan): occupied.add((r + dr, c + dc))
+            placed.append((item, r, c, rowspan, colspan))
+            c += colspan
+
+    n_cols = max(c for _, c in occupied) + 1
+    n_rows = max(r for r, _ in occupied) + 1
+    col_weights = tuple(data.get('col_weights', [1] * n_cols))
+    row_weights = tuple(data.get('row_weights', [1] * n_rows))
+    if len(col_weights) != n_cols or len(row_weights) != n_rows:
+        raise ValueError(f"Layout {data.get('name')!r}: weights do not match a {n_cols}x{n_rows} grid")
+
+    def edges(weights):
+        total = float(sum(weights)) or 1.0
+        out = [0.0]
+        for w in weights: out.append(out[-1] + w / total)
+        return out
+    xs, ys = edges(col_weights), edges(row_weights)
+
+    keys = []
+    for item, r, c, rowspan, colspan in placed:
+        tap = parse_action(item['tap'])
+        repeat = item.get('repeat', False)
+        if repeat is True: repeat = tap
+        elif repeat: repeat = parse_action(repeat)
+        else: repeat = None
+        hold = parse_action(item['hold']) if item.get('hold') else None
+        rect = (xs[c], ys[r], xs[c + colspan], ys[r + rowspan])
+        keys.append(Key(item.get('label', ''), item.get('icon'), r, c, rowspan, colspan,
+                        tap, repeat, hold, item.get('accelerate', False), item.get('font_size', font[1]), rect))
+
+    return Layout(data['name'], data.get('kind', 'numpad'), data.get('size'), font, data.get('pad', 2),
+                  n_cols, n_rows, col_weights, row_weights, tuple(keys), digest)
+
+def _tuples(value):
+    return tuple(_tuples(v) for v in value) if isinstance(value, list) else value
+
+def layout_from_json(fields):
+    """ Rebuilds a Layout from its JSON form: lists become tuples again, keys become Keys. """
+    fields = _tuples(fields)
+    return Layout(*fields[:-2], tuple(Key(*k) for k in fields[-2]), fields[-1])
+
+def hit_test(layout, fx, fy):
+    """ Returns the key under a point given as fractions (0..1) of the keys area. """
+    for key in layout.keys:
+        x0, y0, x1, y1 = key.rect
+        if x0 <= fx < x1 and y0 <= fy < y1: return key
+    return None
+
+class LayoutStore:
+    """ Loads layouts/*.json once, backed by an on-disk cache keyed by file hash. """
+    def __init__(self, directory, cache_file):
+        self.directory = directory
+        self.cache_file = cache_file
+        self.compiled = {}
+        self.disk_cache = None
+
+    def names(self):
+        try: return sorted(f[:-5] for f in os.listdir(self.directory) if f.endswith('.json'))
+        except OSError: return []
+
+    def _load_disk_cache(self):
+        self.disk_cache = {}
+        if os.path.exists(self.cache_file):
+            # JSON rather than pickle: the cache sits in the working directory and must not be able to run code
+            try:
+                with open(self.cache_file, encoding='utf-8') as f:
+                    self.disk_cache = {d: layout_from_json(v) for d, v in json.load(f).items()}
+            except Exception:
+                diagnostics.swallowed("layouts.cache_load"); self.disk_cache = {}
+
+    def _save_disk_cache(self):
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f: json.dump(self.disk_cache, f, separators=(',', ':'))
+        except OSError: diagnostics.swallowed("layouts.cache_save")
+
+    def _digest(self, name):
+        with open(os.path.join(self.directory, name + '.json'), 'rb') as f: raw = f.read()
+        return hashlib.sha1(MODEL_VERSION + raw).hexdigest(), raw
+
+    def _prune_disk_cache(self):
+        """ Drops compiled entries whose source file has since changed or been removed. """
+        live = set()
+        for name in self.names():
+            try: live.add(self._digest(name)[0])
+            except OSError: diagnostics.swallowed("layouts.prune")
+        for digest in [d for d in self.disk_cache if d not in live]: del self.disk_cache[digest]
+
+    def get(self, name):
+        """ The compiled layout, or None when the file is missing or broken (recorded in diagnostics). """
+        if name in self.compiled: return self.compiled[name]
+        if self.disk_cache is None: self._load_disk_cache()
+        try:
+            digest, raw = self._digest(name)
+            layout = self.disk_cache.get(digest)
+            if layout is None:
+                layout = compile_layout(json.loads(raw.decode('utf-8')), digest)
+                self.disk_cache[digest] = layout
+                self._prune_disk_cache()
+                self._save_disk_cache()
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            diagnostics.swallowed(f"layouts.{name}")
+            layout = None
+        self.compiled[name] = layout
+        return layout
@@ -0,0 +1,125 @@
+""" Soak test for Tk object leaks: drives the paths that create widgets, images and timers thousands
+of times against fake backends and fails if anything keeps growing.
+Usage: python leak_check.py [scenario ...] [--cycles N]   exit code 0 = clean, 1 = leak, 2 = could not run """
+import gc
+import sys
+import time
+import tracemalloc
+
+import motion
+from session_replay import FakeInjector, FakeAudio
+
+WARMUP = 25        # cycles run before the baseline so caches, indexes and lazy imports are already built
+TOP_SITES = 8
+# Allowed growth between the baseline and the end of a run, whatever the cycle count
+BUDGET = {'tcl_commands': 4, 'images': 0, 'after_jobs': 2, 'widgets': 0, 'py_bytes': 256 * 1024}
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+def tcl_counts(root):
+    call, split = root.tk.call, root.tk.splitlist
+    return {'tcl_commands': len(split(call('info', 'commands'))), 'images': len(split(call('image', 'names'))),
+            'after_jobs': len(split(call('after', 'info'))), 'widgets': count_widgets(root)}
+
+def settle(root, until=lambda: True, limit=2.0):
+    """ Pump the Tk loop until `until()` holds (or `limit` seconds pass), then flush idle work. """
+    end = time.perf_counter() + limit
+    while True:
+        root.update()
+        if until() or time.perf_counter() > end: break
+        time.sleep(0.005)
+    root.update_idletasks()
+
+def snapshot(root):
+    gc.collect()
+    return tcl_counts(root), tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")))
+
+# --- Scenarios: each runs one open/close (or build/teardown) cycle and leaves the pad as it found it ---
+def cycle_tooltip(app):
+    tip = app.play_tooltip
+    tip.on_enter(); settle(app.root)
+    tip.on_leave(); settle(app.root, lambda: tip.tip_window is None)
+
+def cycle_audio_menu(app):
+    # The device list comes back from the audio worker, so wait for the menu to open
+    is_menu = lambda: any(type(c).__name__ == 'ModernMenu' for c in app.root.winfo_children())
+    app.show_audio_menu(); settle(app.root, is_menu)
+    for child in app.root.winfo_children():
+        if type(child).__name__ == 'ModernMenu': child.destroy()
+    settle(app.root)
+
+def cycle_view(app):
+    app.toggle_input_view(); settle(app.root)
+
+def cycle_emoji(app):
+    app.open_emoji_picker(); settle(app.root)
+    if app.emoji_picker:
+        app.emoji_picker.query.set("smile"); settle(app.root)
+        app.emoji_picker.destroy()
+    settle(app.root)
+
+def cycle_media(app):
+    # Swaps the play/pause PhotoImage and refreshes its tooltip
+    app.commands[('media:playpause', 'tap')](); settle(app.root)
+
+def cycle_pad(app):
+    # A whole extra pad: widgets, tooltips and bindings, with icons coming from the shared cache
+    runtime = app.runtime
+    runtime.close_pad(runtime.add_pad()); settle(app.root)
+
+SCENARIOS = {
+    "tooltip": cycle_tooltip,
+    "audio_menu": cycle_audio_menu,
+    "view": cycle_view,
+    "emoji": cycle_emoji,
+    "media": cycle_media,
+    "pad": cycle_pad,
+}
+
+def check(app, name, cycles):
+    cycle = SCENARIOS[name]
+    for _ in range(WARMUP): cycle(app)
+    before, snap_before = snapshot(app.root)
+    t0 = time.perf_counter()
+    for _ in range(cycles): cycle(app)
+    wall = time.perf_counter() - t0
+    after, snap_after = snapshot(app.root)
+
+    sites = [s for s in snap_after.compare_to(snap_before, 'lineno') if s.size_diff > 0]
+    growth = {k: after[k] - before[k] for k in before}
+    growth['py_bytes'] = sum(s.size_diff for s in snap_after.compare_to(snap_before, 'filename'))
+    over = {k: v for k, v in growth.items() if v > BUDGET[k]}
+
+    print(f"{name:<12} {'LEAK' if over else 'ok':<5} cycles={cycles} {wall / cycles * 1000:.2f}ms/cycle  "
+          + "  ".join(f"{k}={before[k]}->{after[k]}" for k in before) + f"  py_bytes={growth['py_bytes']:+d}")
+    if over:
+        print("  over budget: " + ", ".join(f"{k} +{v} (budget {BUDGET[k]})" for k, v in over.items()))
+        for stat in sites[:TOP_SITES]:
+            frame = stat.traceback[0]
+            print(f"  {frame.filename}:{frame.lineno}  +{stat.size_diff / 1024:.1f} KiB  +{stat.count_diff} blocks")
+    return not over
+
+def main(args):
+    cycles = int(args[args.index('--cycles') + 1]) if '--cycles' in args else 2000
+    names = [a for a in args if a in SCENARIOS] or list(SCENARIOS)
+    try:
+        from main import Runtime
+        app = Runtime(injector=FakeInjector(), audio_switcher=FakeAudio(), background=False, persist=False).pads[0]
+    except Exception as e:
+        print(f"could not start the pad: {e!r}"); return 2
+    # Animations off: geometry changes land immediately, so a cycle never overlaps the previous one
+    motion.policy.configure("off")
+    tracemalloc.start()
+    try:
+        settle(app.root, limit=0.5)
+        results = [check(app, name, cycles) for name in names]
+    finally:
+        tracemalloc.stop()
+        try: app.root.destroy()
+        except Exception: pass
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
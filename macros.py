@@ -0,0 +1,103 @@
+import ctypes
+import time
+
+import diagnostics
+
+try: winmm = ctypes.windll.winmm
+except AttributeError: winmm = None  # Not Windows: benchmarks and replay still run, at the OS timer's default rate
+
+# --- Macro Format ---
+# Steps are strings like "key:enter", "hotkey:ctrl+v", "text:Hello", "delay:150" (ms).
+# compile_macro() folds the delays into absolute offsets, giving a flat (offset_s, op, arg) tuple.
+STEP_KINDS = ('key', 'hotkey', 'text', 'delay')
+
+def compile_macro(steps):
+    t = 0.0
+    actions = []
+    for step in steps:
+        kind, _, arg = step.partition(':')
+        if kind not in STEP_KINDS: raise ValueError(f"Unknown macro step: {step!r}")
+        if kind == 'delay': t += max(0, int(arg)) / 1000.0
+        elif kind == 'hotkey': actions.append((t, kind, tuple(arg.split('+'))))
+        else: actions.append((t, kind, arg))
+    return tuple(actions)
+
+def compile_macros(definitions):
+    """ {name: {"steps": [...], "key": "numpad/7"}} -> {name: actions}, skipping broken entries. """
+    compiled = {}
+    for name, spec in definitions.items():
+        try: compiled[name] = compile_macro(spec.get("steps", []))
+        except (ValueError, AttributeError): diagnostics.swallowed(f"macros.{name}")
+    return compiled
+
+class MacroRunner:
+    """ Puts every action of a macro on the shared scheduler at start + offset and measures jitter. """
+    def __init__(self, scheduler, injector):
+        self.scheduler = scheduler
+        self.injector = injector
+        self.tokens = []
+        self.jitter = []  # seconds late (negative = early) for the most recent run
+        self.max_jitter = 0.0
+        self.runs = 0
+        self.fine_timer = False
+
+    def _timer_period(self, fine):
+        """ Windows ticks timers every ~15.6 ms by default; ask for 1 ms only while a macro is playing. """
+        if fine == self.fine_timer or not winmm: return
+        try:
+            if fine: winmm.timeBeginPeriod(1)
+            else: winmm.timeEndPeriod(1)
+            self.fine_timer = fine
+        except Exception: diagnostics.swallowed("macros.timer_period")
+
+    def run(self, actions, on_done=None):
+        self.cancel()
+        self.jitter = []
+        self.runs += 1
+        self._timer_period(True)
+        start = time.perf_counter()
+        for offset, kind, arg in actions:
+            due = start + offset
+            self.tokens.append(self.scheduler.call_at(due, lambda d=due, k=kind, a=arg: self._fire(d, k, a)))
+        end = start + (actions[-1][0] if actions else 0.0)
+        self.tokens.append(self.scheduler.call_at(end, lambda: self._finish(on_done)))
+
+    def _finish(self, on_done):
+        self.tokens = []
+        self._timer_period(False)
+        if on_done: on_done()
+
+    def _fire(self, due, kind, arg):
+        late = time.perf_counter() - due
+        self.jitter.append(late)
+        if abs(late) > self.max_jitter: self.max_jitter = abs(late)
+        try:
+            if kind == 'key': self.injector.press(arg)
+            elif kind == 'hotkey': self.injector.hotkey(*arg)
+            elif kind == 'text': self.injector.write(arg)
+        except Exception: diagnostics.swallowed("macros.fire")
+
+    def cancel(self):
+        for token in self.tokens: self.scheduler.cancel(token)
+        self.tokens = []
+        self._timer_period(False)
+
+class MacroRecorder:
+    """ Wraps an injector, passing calls through while noting them as macro steps with their gaps. """
+    def __init__(self, inner):
+        self.inner = inner
+        self.steps = []
+        self.last = None
+
+    def _note(self, step):
+        now = time.perf_counter()
+        if self.last is not None:
+            gap = int((now - self.last) * 1000)
+            if gap > 0: self.steps.append(f"delay:{gap}")
+        self.last = now
+        self.steps.append(step)
+
+    def press(self, key): self._note(f"key:{key}"); self.inner.press(key)
+    def hotkey(self, *keys): self._note(f"hotkey:{'+'.join(keys)}"); self.inner.hotkey(*keys)
+    def write(self, text): self._note(f"text:{text}"); self.inner.write(text)
+    def send(self, combo): self.inner.send(combo)
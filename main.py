@@ -1,5 +1,4 @@
 import tkinter as tk
-import pyautogui
 import threading
 import time
 import os
@@ -10,43 +9,291 @@ from PIL import Image, ImageDraw, ImageTk, ImageOps
 
 # --- Custom Module Imports ---
 import config
-from window_utils import resource_path, apply_rounded_corners, set_no_focus, get_monitor_info
-from audio_manager import AudioSwitcher
-from ui_components import ModernButton, ModernMenu, ToolTip
-
-class App:
-    def __init__(self):
+import diagnostics
+import motion
+from window_utils import (resource_path, apply_rounded_corners, set_no_focus, get_monitor_info,
+                          get_foreground_window, set_foreground_window, is_remote_session, get_cursor_pos)
+from audio_manager import AudioWorker
+from injection import Injector
+from session_replay import SessionRecorder
+from scheduler import get_scheduler
+from macros import compile_macros, MacroRunner, MacroRecorder
+from ui_components import ModernButton, ModernMenu, ToolTip, EmojiPicker, Toast, PerfHud
+from layouts import LayoutStore, hit_test
+from emoji_index import EmojiIndex
+from word_index import WordIndex, Completer
+
+MEDIA_KEYS = ('volumeup', 'volumedown', 'playpause')
+
+class Runtime:
+    """ Process-wide resources shared by every pad: the Tk interpreter, settings, decoded icons, word index,
+    audio and injection backends, macros, the tray icon, the keyboard hook and the auto-dock timer. """
+    def __init__(self, injector=None, audio_switcher=None, background=True, persist=True):
         self.root = tk.Tk()
+        self.audio_worker = AudioWorker(lambda: audio_switcher) if audio_switcher else AudioWorker()
+        self.injector = injector or Injector()
+        self.persist = persist
+        self.settings = config.load_config() if persist else {}
+        self.pads = []
+        self.icons = {}
+        self.emoji_index = None
+        self.ignore_next_keypress = False
+        self.stop_threads = False
+        self.timeout = self.settings.get("timeout", 5)
+        self.hide_on_type = self.settings.get("hide_on_type", True) 
+        self.always_default_dock = self.settings.get("always_default_dock", False)
+        self.layouts = LayoutStore(resource_path(config.LAYOUT_DIR), config.LAYOUT_CACHE_FILE)
+        try:
+            words = WordIndex.load(resource_path(config.WORDS_FILE), config.WORD_INDEX_FILE)
+            self.completer = Completer(words, self.settings.get("learned_words"), config.MAX_LEARNED_WORDS)
+        except Exception:
+            diagnostics.swallowed("main.word_index")
+            self.completer = None
+        self.load_macros()
+        motion.policy.configure(self.settings.get("animations", "auto"), is_remote_session())
+        self.macro_runner = MacroRunner(get_scheduler(self.root), self.injector)
+        # Context-menu state is shared, so every pad's menu shows the same ticks
+        self.hide_on_type_var = tk.BooleanVar(value=self.hide_on_type)
+        self.always_default_dock_var = tk.BooleanVar(value=self.always_default_dock)
+        self.no_animation_var = tk.BooleanVar(value=motion.policy.setting == "off")
+        self.macro_recording_var = tk.BooleanVar(value=False)
+        self.hud = None
+        self.hud_var = tk.BooleanVar(value=False)
+        diagnostics.sections["motion"] = motion.policy.stats
+        diagnostics.sections["key repeat"] = lambda: get_scheduler(self.root).repeat_stats
+        diagnostics.sections["macros"] = lambda: {'runs': self.macro_runner.runs,
+                                                  'max_jitter_ms': round(self.macro_runner.max_jitter * 1000, 2)}
+        diagnostics.sections["pads"] = lambda: {'open': len(self.pads), 'cached_icons': len(self.icons)}
+
+        # The first pad lives in the Tk root and keeps its settings at the top level; extra pads are Toplevels
+        self.pads.append(Pad(self, self.root, self.settings))
+        for pad_settings in self.settings.get("pads", []): self.add_pad(pad_settings)
+        if not background: return
+        
+        try: keyboard.on_press(self.on_physical_keypress)
+        except Exception: diagnostics.swallowed("main.keyboard_hook")
+        self.setup_audio_hotkeys()
+
+        threading.Thread(target=self.timer_loop, daemon=True).start()
+        threading.Thread(target=self.setup_tray, daemon=True).start()
+
+    def add_pad(self, pad_settings=None):
+        """ Opens another pad; a new one starts undocked, offset from the last, and is remembered in settings["pads"]. """
+        dock = pad_settings is not None
+        if pad_settings is None:
+            n = len(self.pads)
+            pad_settings = {"geometry": f"{config.DEFAULT_WIDTH}x{config.DEFAULT_HEIGHT}+{500 + 40 * n}+{200 + 40 * n}"}
+            self.settings.setdefault("pads", []).append(pad_settings)
+        pad = Pad(self, tk.Toplevel(self.root), pad_settings, dock=dock)
+        self.pads.append(pad)
+        if not dock: self.save_config()
+        return pad
+
+    def close_pad(self, pad):
+        if pad.root is self.root: return
+        self.pads.remove(pad)
+        self.settings["pads"] = [s for s in self.settings.get("pads", []) if s is not pad.pad_settings]
+        if pad.recorder: pad.recorder.close()
+        pad.close()
+        self.save_config()
+
+    def toggle_hud(self, pad):
+        if self.hud: self.hud.close(); self.hud = None
+        else:
+            x = pad.root.winfo_rootx() + pad.root.winfo_width() + 8
+            self.hud = PerfHud(self.root, x, pad.root.winfo_rooty(), on_click=lambda: self.toggle_hud(pad))
+        self.hud_var.set(self.hud is not None)
+
+    def icon(self, path, size=(22, 22)):
+        """ Decoded once per process; every pad shows the same PhotoImage. """
+        key = (path, size)
+        if key not in self.icons: self.icons[key] = self.load_icon(path, size)
+        return self.icons[key]
+
+    def load_icon(self, path, size):
+        full_path = resource_path(path)
+        if not os.path.exists(full_path): return None
+        try:
+            img = Image.open(full_path)
+            if img.mode == 'RGBA':
+                r, g, b, a = img.split()
+                rgb = Image.merge('RGB', (r,g,b))
+                inverted = ImageOps.invert(rgb)
+                r2, g2, b2 = inverted.split()
+                img = Image.merge('RGBA', (r2, g2, b2, a))
+            else:
+                img = ImageOps.invert(img.convert('RGB'))
+            img = img.resize(size, Image.Resampling.LANCZOS)
+            return ImageTk.PhotoImage(img)
+        except Exception:
+            diagnostics.swallowed("main.load_icon")
+            return None
+
+    def update_preferences(self):
+        self.hide_on_type = self.hide_on_type_var.get()
+        self.always_default_dock = self.always_default_dock_var.get()
+        motion.policy.configure("off" if self.no_animation_var.get() else "auto", motion.policy.remote)
+        self.save_config()
+
+    def set_timeout(self, seconds): self.timeout = seconds; self.save_config()
+
+    def update_suggestions(self):
+        for pad in self.pads: pad.update_suggestions()
+
+    def load_macros(self):
+        definitions = self.settings.get("macros", {})
+        self.macros = compile_macros(definitions)
+        self.macro_keys = {spec["key"]: name for name, spec in definitions.items()
+                           if isinstance(spec, dict) and spec.get("key") and name in self.macros}
+
+    def toggle_macro_recording(self):
+        if isinstance(self.injector, MacroRecorder):
+            steps = self.injector.steps
+            self.injector = self.injector.inner
+            if steps:
+                definitions = self.settings.setdefault("macros", {})
+                n = len(definitions) + 1
+                while f"Macro {n}" in definitions: n += 1
+                definitions[f"Macro {n}"] = {"steps": steps}
+                self.load_macros()
+                self.save_config()
+        else: self.injector = MacroRecorder(self.injector)
+        self.macro_recording_var.set(isinstance(self.injector, MacroRecorder))
+        for pad in self.pads: pad.refresh_macro_menu()
+
+    def on_physical_keypress(self, event):
+        if self.ignore_next_keypress or any(pad.emoji_picker for pad in self.pads): return
+        # Runs on the keyboard hook's thread; the completer belongs to Tk
+        if self.completer: self.root.after(0, self.reset_completion)
+        for pad in list(self.pads): pad.on_physical_keypress(event)
+
+    def reset_completion(self):
+        self.completer.reset()
+        self.update_suggestions()
+
+    def timer_loop(self):
+        while not self.stop_threads:
+            for pad in list(self.pads):
+                try: pad.check_idle()
+                except Exception: diagnostics.swallowed("main.timer_loop")  # A pad closed mid-pass
+            time.sleep(0.5)
+
+    def setup_audio_hotkeys(self):
+        """ "audio_presets": {"Headset": "headset"} maps preset names to a device name fragment or id;
+        "audio_hotkeys": {"cycle": "ctrl+alt+o", "Headset": "ctrl+alt+1"} binds them globally. """
+        presets = self.settings.get("audio_presets", {})
+        for target, combo in self.settings.get("audio_hotkeys", {}).items():
+            if target == "cycle": action = lambda: self.audio_worker.cycle(list(presets.values()) or None, self.on_audio_switched)
+            elif target in presets: action = lambda m=presets[target]: self.audio_worker.switch_to(m, self.on_audio_switched)
+            else: continue
+            try: keyboard.add_hotkey(combo, action)
+            except Exception: diagnostics.swallowed("main.audio_hotkey")
+
+    def on_audio_switched(self, device):
+        # Runs on the audio thread; hop to Tk before touching widgets. No device means nothing switched.
+        if not device: return
+        self.root.after(0, lambda: self.pads[0].show_toast(f"🎧  {device['name']}"))
+
+    def setup_tray(self):
+        menu = TrayMenu(TrayItem('Show', self.show_from_tray, default=True), 
+                        TrayItem('Dock to Default', self.force_default_dock),
+                        TrayItem('Add Pad', lambda icon, item: self.root.after(0, self.add_pad)),
+                        TrayItem('Dump Diagnostics', self.dump_diagnostics),
+                        TrayItem('Quit', self.quit_app))
+        img = Image.new('RGB', (64,64), (30,30,30)); d = ImageDraw.Draw(img)
+        d.rectangle([16,26,48,38], fill="white")
+        self.tray = TrayIcon("FloatPad", img, "FloatPad", menu)
+        self.tray.run()
+
+    def dump_diagnostics(self, icon=None, item=None):
+        path = os.path.abspath(config.DIAG_DUMP_FILE)
+        try:
+            diagnostics.write_dump(path)
+            os.startfile(path)
+        except Exception: diagnostics.swallowed("main.dump_diagnostics")
+
+    def show_from_tray(self, icon=None, item=None):
+        for pad in list(self.pads): pad.show_from_tray()
+
+    def force_default_dock(self, icon=None, item=None):
+        # Side by side along the top edge so the docked tabs never overlap
+        for i, pad in enumerate(list(self.pads)): pad.force_default_dock(offset=90 * i)
+
+    def save_config(self):
+        if not self.persist: return
+        for pad in self.pads: pad.store_state()
+        self.settings.update({
+            "timeout": self.timeout, "hide_on_type": self.hide_on_type,
+            "always_default_dock": self.always_default_dock,
+            "animations": motion.policy.setting,
+            "learned_words": self.completer.learned if self.completer else self.settings.get("learned_words", {})
+        })
+        config.save_config_file(self.settings)
+    
+    def quit_app(self, *args):
+        self.save_config()
+        for pad in self.pads:
+            if pad.recorder: pad.recorder.close()
+        self.stop_threads = True
+        try: keyboard.unhook_all()
+        except Exception: diagnostics.swallowed("main.quit")
+        try: self.tray.stop()
+        except Exception: diagnostics.swallowed("main.quit")
+        try: self.root.quit(); self.root.destroy()
+        except Exception: diagnostics.swallowed("main.quit")
+        os._exit(0)
+
+class Pad:
+    """ One floating pad window. It holds only its widgets, geometry and dock state; shared resources live on the runtime. """
+    def __init__(self, runtime, window, pad_settings, dock=True):
+        self.runtime = runtime
+        self.root = window
         self.root.title("FloatPad")
         self.root.configure(bg=config.BG_COLOR)
-        self.audio_switcher = AudioSwitcher()
+        self.pad_settings = pad_settings
+        self.settings = runtime.settings
+        self.audio_worker = runtime.audio_worker
+        self.layouts = runtime.layouts
+        self.completer = runtime.completer
+        self.recorder = None
+        self.commands = {}
+        self.jobs = set()  # Pending after() ids, cancelled by close()
+        self.closed = False
+        self.tooltips = []
         
         self.is_docked = False
         self.is_animating = False
         self.last_interaction = time.time()
         self.emoji_panel_open_time = 0
-        self.ignore_next_keypress = False
+        self.emoji_picker = None
         self.docking_paused = False
         self.drag_start_x = 0
         self.drag_start_y = 0
+        self.press_x = self.press_y = 0
+        # Hit-test rectangles (x, y, w, h): 'window' on screen, the rest relative to the window; see on_configure
+        self.geo = {'window': (0, 0, 0, 0), 'media': (0, 0, 0, 0), 'keys': (0, 0, 0, 0)}
+        self.visible = True  # Tracked from <Map>/<Unmap> so other threads never ask Tk
         self.is_keyboard_view = False
+        self.layout = None
         self.shift_active = False
         self.caps_active = False
         self.letter_buttons = []
-        self.settings = config.load_config()
+        self.shift_btn = None
+        self.caps_btn = None
         
         # --- MEMORY FOR WINDOW SIZES ---
-        start_geo = self.settings.get("geometry", f"{config.DEFAULT_WIDTH}x{config.DEFAULT_HEIGHT}+500+200")
+        start_geo = self.pad_settings.get("geometry", f"{config.DEFAULT_WIDTH}x{config.DEFAULT_HEIGHT}+500+200")
         try:
             self.numpad_wh = start_geo.split('+')[0] 
-        except:
+        except Exception:
             self.numpad_wh = f"{config.DEFAULT_WIDTH}x{config.DEFAULT_HEIGHT}"
             
-        self.keyboard_wh = "480x460" 
-        self.timeout = self.settings.get("timeout", 5)
-        self.hide_on_type = self.settings.get("hide_on_type", True) 
-        self.always_default_dock = self.settings.get("always_default_dock", False)
-        self.last_dock_geo = self.settings.get("last_dock_geo", None)
+        # Broken layout files are skipped (LayoutStore.get records them) rather than keeping the pad from starting
+        self.layout_order = [n for n in self.pad_settings.get("layouts", config.DEFAULT_LAYOUTS) if self.layouts.get(n)]
+        if not self.layout_order: self.layout_order = [n for n in self.layouts.names() if self.layouts.get(n)]
+        self.layout_index = 0
+        self.layout_wh = {self.layout_order[0]: self.numpad_wh}
+        self.last_dock_geo = self.pad_settings.get("last_dock_geo", None)
         
         if "1x1" in start_geo: start_geo = f"{config.DEFAULT_WIDTH}x{config.DEFAULT_HEIGHT}+500+200"
         self.root.geometry(start_geo)
@@ -60,15 +307,45 @@ class App:
         self.setup_ui()
         self.setup_dock_ui()
         self.setup_context_menu()
+        self.root.bind("<Configure>", self.on_configure, add="+")
+        self.root.bind("<Map>", lambda e: e.widget is self.root and setattr(self, 'visible', True), add="+")
+        self.root.bind("<Unmap>", lambda e: e.widget is self.root and setattr(self, 'visible', False), add="+")
         
-        self.root.after(100, self.dock_window)
-        self.stop_threads = False
-        
-        try: keyboard.on_press(self.on_physical_keypress)
-        except: pass
-
-        threading.Thread(target=self.timer_loop, daemon=True).start()
-        threading.Thread(target=self.setup_tray, daemon=True).start()
+        if dock: self.after(100, self.dock_window)
+
+    def after(self, ms, fn):
+        """ root.after that remembers the job, so close() can cancel whatever is still pending.
+        The timer, hook and tray threads call it too: the job can run before root.after returns
+        there, and one scheduled while close() runs still lands, so run() checks `closed`. """
+        job = {}
+        def run():
+            job['ran'] = True
+            self.jobs.discard(job.get('id'))
+            if not self.closed: fn()
+        job['id'] = self.root.after(ms, run)
+        if not job.get('ran'): self.jobs.add(job['id'])
+        return job['id']
+
+    def close(self):
+        """ Cancels pending jobs and closes popups before the window goes, so nothing runs against it later. """
+        self.closed = True
+        for job in list(self.jobs): self.root.after_cancel(job)
+        self.jobs.clear()
+        for tip in self.tooltips: tip.destroy_window()
+        if self.emoji_picker: self.emoji_picker.destroy()
+        if hasattr(self, 'toast'): self.toast.close()
+        for child in self.root.winfo_children():
+            if isinstance(child, tk.Toplevel): child.destroy()
+        self.root.destroy()
+
+    @property
+    def injector(self): return self.runtime.injector
+
+    @property
+    def ignore_next_keypress(self): return self.runtime.ignore_next_keypress
+
+    @ignore_next_keypress.setter
+    def ignore_next_keypress(self, value): self.runtime.ignore_next_keypress = value
 
     def set_no_focus(self):
         hwnd = ctypes.windll.user32.GetParent(self.root.winfo_id())
@@ -80,11 +357,6 @@ class App:
         set_no_focus(hwnd)
         self.root.configure(bg=config.BG_COLOR)
     
-    def update_preferences(self):
-        self.hide_on_type = self.hide_on_type_var.get()
-        self.always_default_dock = self.always_default_dock_var.get()
-        self.save_config()
-
     def setup_ui(self):
         self.main_frame = tk.Frame(self.root, bg=config.BG_COLOR)
         self.main_frame.pack(fill="both", expand=True)
@@ -107,23 +379,7 @@ class App:
 
         # --- STEP 1: LOAD IMAGES ---
         try:
-            def load_and_process(path, size=(22, 22)):
-                full_path = resource_path(path)
-                if not os.path.exists(full_path): return None
-                try:
-                    img = Image.open(full_path)
-                    if img.mode == 'RGBA':
-                        r, g, b, a = img.split()
-                        rgb = Image.merge('RGB', (r,g,b))
-                        inverted = ImageOps.invert(rgb)
-                        r2, g2, b2 = inverted.split()
-                        img = Image.merge('RGBA', (r2, g2, b2, a))
-                    else:
-                        img = ImageOps.invert(img.convert('RGB'))
-                    img = img.resize(size, Image.Resampling.LANCZOS)
-                    return ImageTk.PhotoImage(img)
-                except: return None
-
+            load_and_process = self.runtime.icon
             self.play_icon_img = load_and_process("icon/play.png")
             self.pause_icon_img = load_and_process("icon/pause.png")
             self.vol_down_img = load_and_process("icon/volumedown.png")
@@ -139,12 +395,16 @@ class App:
             self.shift_on_icon = load_and_process("icon/shift_light.png")
 
         except Exception:
+            diagnostics.swallowed("main.load_icons")
             self.play_icon_img = "⏯"; self.pause_icon_img = "⏯"
             self.vol_down_img = "🔉"; self.vol_up_img = "🔊"; self.headphone_img = "🎧"
             self.backspace_img = "⌫"; self.enter_img = "⏎"
             self.keyboard_icon = "⌨"; self.numpad_icon = "🔢"; self.emoji_icon = "☺"
             self.space_icon = "Space"; self.shift_off_icon = "⇧"; self.shift_on_icon = "⬆"
 
+        self.key_icons = {'backspace': self.backspace_img, 'enter': self.enter_img,
+                          'space': self.space_icon, 'shift': self.shift_off_icon}
+
         # 2. Bottom Bar
         self.bottom_bar = tk.Frame(self.main_frame, bg=config.BG_COLOR)
         self.bottom_bar.pack(side="bottom", fill="x", padx=5, pady=5)
@@ -162,10 +422,11 @@ class App:
                                   bg=config.BG_COLOR, fg="#666666", cursor="hand2", font=("Segoe UI", 14))
         if isinstance(emoji_content, tk.PhotoImage): self.emoji_btn.image = emoji_content 
         self.emoji_btn.pack(side="left", padx=(5, 0))
-        self.emoji_btn.bind("<Button-1>", self.open_emoji_panel)
+        self.emoji_btn.bind("<Button-1>", self.open_emoji_picker)
+        self.emoji_btn.bind("<Button-3>", self.open_emoji_panel)
         self.emoji_btn.bind("<Enter>", lambda e: self.emoji_btn.config(bg="#3e3e42"))
         self.emoji_btn.bind("<Leave>", lambda e: self.emoji_btn.config(bg=config.BG_COLOR))
-        ToolTip(self.emoji_btn, lambda: "Windows Emoji Panel")
+        self.tooltips.append(ToolTip(self.emoji_btn, lambda: "Emoji (right-click: Windows panel)"))
 
         toggle_content = self.keyboard_icon if isinstance(self.keyboard_icon, tk.PhotoImage) else "⌨"
         self.toggle_btn = tk.Label(self.bottom_bar, 
@@ -198,153 +459,192 @@ class App:
                 if hasattr(self, 'play_tooltip'): self.play_tooltip.refresh()
 
         media_items = [
-            (self.vol_down_img, lambda: self.virtual_key_action('volumedown'), "Volume/Scroll Down", True), 
-            (self.play_icon_img, toggle_media, None, False), 
-            (self.vol_up_img, lambda: self.virtual_key_action('volumeup'), "Volume/Scroll Up", True),
-            (self.headphone_img, self.show_audio_menu, "Audio Devices", False)
+            ("media:volumedown", self.vol_down_img, lambda: self.virtual_key_action('volumedown'), "Volume/Scroll Down", True), 
+            ("media:playpause", self.play_icon_img, toggle_media, None, False), 
+            ("media:volumeup", self.vol_up_img, lambda: self.virtual_key_action('volumeup'), "Volume/Scroll Up", True),
+            ("media:audio", self.headphone_img, self.show_audio_menu, "Audio Devices", False)
         ]
         
-        for i, (content_item, cmd, tip_text, can_repeat) in enumerate(media_items):
-            btn = ModernButton(self.media_frame, content=content_item, command=cmd, 
+        for i, (key_id, content_item, cmd, tip_text, can_repeat) in enumerate(media_items):
+            btn = ModernButton(self.media_frame, content=content_item, command=self.pad_command(key_id, 'tap', cmd),
+                               repeat_command=self.pad_command(key_id, 'repeat', cmd) if can_repeat else None,
                                bg="#2b2b2b", hover_bg="#3e3e42", font=("Segoe UI", 12),
-                               repeat=can_repeat) 
+                               repeat=can_repeat, accelerate=can_repeat) 
             btn.grid(row=0, column=i, sticky="nsew", padx=2)
             self.media_frame.grid_columnconfigure(i, weight=1)
             btn.bind("<MouseWheel>", self.on_mouse_scroll)
             if content_item == self.headphone_img: self.audio_btn_widget = btn
             elif content_item == self.play_icon_img: self.play_btn = btn
-            if tip_text: ToolTip(btn, lambda t=tip_text: t)
+            if tip_text: self.tooltips.append(ToolTip(btn, lambda t=tip_text: t))
+
+        self.suggestion_bar = tk.Frame(content, bg=config.BG_COLOR)
+        self.suggestion_btns = []
+        for i in range(3):
+            btn = ModernButton(self.suggestion_bar, content="", command=self.pad_command(f"suggest:{i}", 'tap', lambda i=i: self.accept_suggestion(i)),
+                               bg="#2b2b2b", hover_bg="#3e3e42", font=("Segoe UI", 10))
+            btn.grid(row=0, column=i, sticky="nsew", padx=1)
+            self.suggestion_bar.grid_columnconfigure(i, weight=1, uniform="suggest")
+            self.suggestion_btns.append(btn)
 
         self.keys_container = tk.Frame(content, bg=config.BG_COLOR)
         self.keys_container.pack(expand=True, fill="both")
-        self.build_numpad()
+        self.build_layout(self.layouts.get(self.layout_order[0]))
 
         def get_play_btn_text(): return "Pause" if self.is_playing else "Play"
-        if hasattr(self, 'play_btn'): self.play_tooltip = ToolTip(self.play_btn, get_play_btn_text)
+        if hasattr(self, 'play_btn'):
+            self.play_tooltip = ToolTip(self.play_btn, get_play_btn_text)
+            self.tooltips.append(self.play_tooltip)
         self.root.bind("<MouseWheel>", self.on_mouse_scroll)
         self.root.bind("<Button-2>", self.on_middle_click)
     
-    def toggle_input_view(self, event=None):
-        current_geo = self.root.geometry()
-        current_wh = current_geo.split('+')[0] 
-        if self.is_keyboard_view: self.keyboard_wh = current_wh
-        else: self.numpad_wh = current_wh
-        self.is_keyboard_view = not self.is_keyboard_view
-        for widget in self.keys_container.winfo_children(): widget.destroy()
-            
-        if self.is_keyboard_view:
-            self.shift_active = True 
-            self.caps_active = False
-            self.build_alpha_keyboard()
-            if isinstance(self.numpad_icon, tk.PhotoImage):
-                self.toggle_btn.configure(image=self.numpad_icon, text=""); self.toggle_btn.image = self.numpad_icon
-            else: self.toggle_btn.configure(image="", text="🔢")
-            target_str = self.keyboard_wh
+    def pad_command(self, key_id, role, fn):
+        """ Registers a pad action under a stable id so sessions can be recorded and replayed. """
+        if fn is None: return None
+        self.commands[(key_id, role)] = fn
+        def run():
+            if self.recorder: self.recorder.log(role, key_id)
+            hud = self.runtime.hud
+            if hud is None: return fn()
+            started = time.perf_counter(); fn(); hud.tap_done(started)
+        return run
+
+    def record(self, kind, *args):
+        if self.recorder: self.recorder.log(kind, *args)
+
+    def run_macro(self, name):
+        actions = self.runtime.macros.get(name)
+        if not actions: return
+        self.last_interaction = time.time()
+        self.ignore_next_keypress = True
+        runner = self.runtime.macro_runner
+        runner.injector = self.injector
+        runner.run(actions, on_done=lambda: self.after(100, lambda: setattr(self, 'ignore_next_keypress', False)))
+
+    def refresh_macro_menu(self):
+        macros = self.runtime.macros
+        self.macro_menu.delete(0, "end")
+        self.macro_menu.add_checkbutton(label="Record Macro", variable=self.runtime.macro_recording_var,
+                                        command=self.runtime.toggle_macro_recording)
+        if macros: self.macro_menu.add_separator()
+        for name in sorted(macros):
+            self.macro_menu.add_command(label=name, command=lambda n=name: self.run_macro(n))
+
+    def toggle_recording(self):
+        if self.recorder:
+            self.recorder.close(); self.recorder = None
         else:
-            self.build_numpad()
+            self.recorder = SessionRecorder(time.strftime(config.SESSION_FILE_PATTERN))
+            geometry = self.saved_geometry if self.is_docked else self.root.geometry()
+            self.recorder.log('start', geometry, int(self.is_docked), self.layout.name, self.last_dock_geo or '')
+        self.recording_var.set(self.recorder is not None)
+
+    def toggle_input_view(self, event=None):
+        self.record('view')
+        self.layout_wh[self.layout.name] = self.root.geometry().split('+')[0]
+        self.layout_index = (self.layout_index + 1) % len(self.layout_order)
+        self.build_layout(self.layouts.get(self.layout_order[self.layout_index]))
+        target_str = self.layout_wh.get(self.layout.name) or self.layout.size or self.numpad_wh
+
+        next_kind = self.layouts.get(self.layout_order[(self.layout_index + 1) % len(self.layout_order)]).kind
+        if next_kind == 'keyboard':
             if isinstance(self.keyboard_icon, tk.PhotoImage):
                 self.toggle_btn.configure(image=self.keyboard_icon, text=""); self.toggle_btn.image = self.keyboard_icon
             else: self.toggle_btn.configure(image="", text="⌨")
-            target_str = self.numpad_wh
+        else:
+            if isinstance(self.numpad_icon, tk.PhotoImage):
+                self.toggle_btn.configure(image=self.numpad_icon, text=""); self.toggle_btn.image = self.numpad_icon
+            else: self.toggle_btn.configure(image="", text="🔢")
 
         try:
             w, h = map(int, target_str.split('x'))
             self.animate_resize(w, h)
-        except: self.root.geometry(target_str)
+        except Exception: self.root.geometry(target_str)
 
     def open_emoji_panel(self, event=None):
         self.last_interaction = time.time()
         self.emoji_panel_open_time = time.time()
         self.docking_paused = True
-        try: keyboard.send('windows+;') 
-        except: 
-            try: pyautogui.hotkey('win', ';')
-            except: pass
-
-    def build_numpad(self):
-        for i in range(10):
-            self.keys_container.grid_columnconfigure(i, weight=0)
-            self.keys_container.grid_rowconfigure(i, weight=0)
-
-        numpad = ['7', '8', '9', '4', '5', '6', '1', '2', '3', 'backspace', '0', 'enter']
-        key_content = {
-            'backspace': self.backspace_img if self.backspace_img else '⌫',
-            'enter': self.enter_img if self.enter_img else '⏎'
-        }
-        for i, key in enumerate(numpad):
-            r = i // 3; c = i % 3
-            content = key_content.get(key, key)
-            should_repeat = False
-            custom_command = None; custom_repeat = None
-            if key == 'enter':
-                should_repeat = True
-                custom_command = lambda: self.virtual_key_action('enter')
-                custom_repeat = lambda: self.virtual_key_action_hotkey('shift', 'enter')
-            elif key == 'backspace':
-                should_repeat = True
-                custom_command = lambda: self.virtual_key_action('backspace')
-            else:
-                custom_command = lambda k=key: self.virtual_key_action(k)
+        try: self.injector.send('windows+;') 
+        except Exception:
+            try: self.injector.hotkey('win', ';')
+            except Exception: diagnostics.swallowed("main.open_emoji_panel")
+        return "break"
 
-            btn = ModernButton(self.keys_container, content=content, command=custom_command,
-                               repeat_command=custom_repeat, bg="#252526", hover_bg="#37373d", 
-                               font=("Segoe UI", 14), height=2, repeat=should_repeat)
-            btn.grid(row=r, column=c, sticky="nsew", padx=2, pady=2)
-            self.keys_container.grid_columnconfigure(c, weight=1)
-            self.keys_container.grid_rowconfigure(r, weight=1)
+    def open_emoji_picker(self, event=None):
+        self.last_interaction = time.time()
+        if self.emoji_picker: self.emoji_picker.destroy(); return
+        runtime = self.runtime
+        if runtime.emoji_index is None: runtime.emoji_index = EmojiIndex.load(config.EMOJI_INDEX_FILE)
+        self.emoji_target_hwnd = get_foreground_window()
+        x = self.emoji_btn.winfo_rootx()
+        y = self.emoji_btn.winfo_rooty() + self.emoji_btn.winfo_height() + 5
+        if y + 330 > self.root.winfo_screenheight(): y = self.emoji_btn.winfo_rooty() - 330
+        self.emoji_picker = EmojiPicker(self.root, x, y, runtime.emoji_index,
+                                        self.settings.get("recent_emoji", []), self.insert_emoji)
+        self.emoji_picker.bind("<Destroy>", lambda e: setattr(self, 'emoji_picker', None) if e.widget is self.emoji_picker else None)
+
+    def insert_emoji(self, glyph):
+        recent = [glyph] + [g for g in self.settings.get("recent_emoji", []) if g != glyph]
+        self.settings["recent_emoji"] = recent[:config.MAX_RECENT_EMOJI]
+        set_foreground_window(self.emoji_target_hwnd)
+        self.after(50, lambda: self.virtual_key_action_text(glyph))
+        self.save_config()
 
-    def build_alpha_keyboard(self):
+    def build_layout(self, layout):
+        for widget in self.keys_container.winfo_children(): widget.destroy()
+        prev = self.layout
+        for i in range(max(10, prev.cols if prev else 0, prev.rows if prev else 0)):
+            self.keys_container.grid_columnconfigure(i, weight=0, uniform="")
+            self.keys_container.grid_rowconfigure(i, weight=0, uniform="")
+
+        self.layout = layout
+        self.is_keyboard_view = layout.kind == 'keyboard'
         self.letter_buttons = []
-        letters = "abcdefghijklmnopqrstuvwxyz"
-        row_idx = 0; col_idx = 0
-        for char in letters:
-            cmd_tap = lambda c=char: self.type_letter(c)
-            cmd_hold = lambda c=char: self.type_letter(c, force_upper=True)
-            btn = ModernButton(self.keys_container, content=char, command=cmd_tap,
-                               long_press_command=cmd_hold, bg="#252526", hover_bg="#37373d", 
-                               font=("Segoe UI", 11), height=1)
-            self.letter_buttons.append((btn, char)) 
-            btn.grid(row=row_idx, column=col_idx, sticky="nsew", padx=1, pady=1)
-            self.keys_container.grid_columnconfigure(col_idx, weight=1)
-            col_idx += 1
-            if col_idx > 4: 
-                col_idx = 0; row_idx += 1
-        
-        row_idx += 1
-        extras = [',', '.', '?', '!', '@']
-        for i, char in enumerate(extras):
-             btn = ModernButton(self.keys_container, content=char, command=lambda c=char: self.virtual_key_action_text(c),
-                                bg="#252526", hover_bg="#37373d", font=("Segoe UI", 11), height=1)
-             btn.grid(row=row_idx, column=i, sticky="nsew", padx=1, pady=1)
-
-        row_idx += 1
-        shift_content = self.shift_off_icon if self.shift_off_icon else "⇧"
-        self.shift_btn = ModernButton(self.keys_container, content=shift_content, command=self.toggle_shift, 
-                                      bg="#252526", hover_bg="#37373d", font=("Segoe UI", 10), height=1)
-        self.shift_btn.grid(row=row_idx, column=0, sticky="nsew", padx=1, pady=1)
-
-        self.caps_btn = ModernButton(self.keys_container, content="Caps", command=self.toggle_caps, 
-                                     bg="#252526", hover_bg="#37373d", font=("Segoe UI", 8), height=1)
-        self.caps_btn.grid(row=row_idx, column=1, sticky="nsew", padx=1, pady=1)
-
-        space_content = self.space_icon if self.space_icon else "Space"
-        btn_space = ModernButton(self.keys_container, content=space_content, command=lambda: self.virtual_key_action('space'),
-                                 bg="#252526", hover_bg="#37373d", font=("Segoe UI", 9), height=1)
-        btn_space.grid(row=row_idx, column=2, sticky="nsew", padx=1, pady=1)
-
-        bk_c = self.backspace_img if self.backspace_img else "⌫"
-        btn_bk = ModernButton(self.keys_container, content=bk_c, command=lambda: self.virtual_key_action('backspace'),
-                              bg="#252526", hover_bg="#37373d", font=("Segoe UI", 10), height=1, repeat=True)
-        btn_bk.grid(row=row_idx, column=3, sticky="nsew", padx=1, pady=1)
-
-        en_c = self.enter_img if self.enter_img else "⏎"
-        btn_en = ModernButton(self.keys_container, content=en_c, command=lambda: self.virtual_key_action('enter'),
-                              repeat_command=lambda: self.virtual_key_action_hotkey('shift', 'enter'),
-                              bg="#252526", hover_bg="#37373d", font=("Segoe UI", 10), height=1, repeat=True)
-        btn_en.grid(row=row_idx, column=4, sticky="nsew", padx=1, pady=1)
-
-        for r in range(row_idx + 1): self.keys_container.grid_rowconfigure(r, weight=1)
-        self.update_keyboard_visuals()
+        self.shift_btn = None
+        self.caps_btn = None
+        if self.is_keyboard_view:
+            self.shift_active = True
+            self.caps_active = False
+
+        for n, key in enumerate(layout.keys):
+            content = self.key_icons.get(key.icon) or key.label
+            key_id = f"{layout.name}:{n}"
+            hold = self.make_action(key.hold) if key.hold else None
+            macro = self.runtime.macro_keys.get(f"{layout.name}/{key.label}")
+            if macro: hold = lambda m=macro: self.run_macro(m)
+            btn = ModernButton(self.keys_container, content=content,
+                               command=self.pad_command(key_id, 'tap', self.make_action(key.tap)),
+                               repeat_command=self.pad_command(key_id, 'repeat', self.make_action(key.repeat)) if key.repeat else None,
+                               long_press_command=self.pad_command(key_id, 'hold', hold),
+                               bg="#252526", hover_bg="#37373d", font=(layout.font[0], key.font_size),
+                               repeat=key.repeat is not None, accelerate=key.accelerate)
+            btn.grid(row=key.row, column=key.col, rowspan=key.rowspan, columnspan=key.colspan,
+                     sticky="nsew", padx=layout.pad, pady=layout.pad)
+            kind = key.tap[0]
+            if kind == 'letter': self.letter_buttons.append((btn, key.tap[1]))
+            elif kind == 'shift': self.shift_btn = btn
+            elif kind == 'caps': self.caps_btn = btn
+
+        # Uniform groups size cells strictly by weight, so the layout's fractional key rects match the screen
+        for c, weight in enumerate(layout.col_weights): self.keys_container.grid_columnconfigure(c, weight=weight, uniform="keycol")
+        for r, weight in enumerate(layout.row_weights): self.keys_container.grid_rowconfigure(r, weight=weight, uniform="keyrow")
+        if self.is_keyboard_view:
+            self.suggestion_bar.pack(fill="x", pady=(0, 4), before=self.keys_container)
+            self.update_keyboard_visuals()
+        else: self.suggestion_bar.pack_forget()
+        if self.completer: self.completer.reset()
+        self.update_suggestions()
+
+    def make_action(self, action):
+        kind, arg = action
+        if kind == 'key': return lambda: self.virtual_key_action(arg)
+        if kind == 'hotkey': return lambda: self.virtual_key_action_hotkey(*arg)
+        if kind == 'text': return lambda: self.virtual_key_action_text(arg)
+        if kind == 'letter': return lambda: self.type_letter(arg)
+        if kind == 'upper': return lambda: self.type_letter(arg, force_upper=True)
+        if kind == 'shift': return self.toggle_shift
+        if kind == 'caps': return self.toggle_caps
+        return None
 
     def update_keyboard_visuals(self):
         is_upper = self.shift_active or self.caps_active
@@ -352,7 +652,7 @@ class App:
             text = char.upper() if is_upper else char.lower()
             btn.configure(text=text)
             
-        if hasattr(self, 'shift_btn'):
+        if self.shift_btn:
             if isinstance(self.shift_on_icon, tk.PhotoImage) and isinstance(self.shift_off_icon, tk.PhotoImage):
                 new_img = self.shift_on_icon if self.shift_active else self.shift_off_icon
                 self.shift_btn.configure(image=new_img, text="", bg="#252526"); self.shift_btn.image = new_img
@@ -361,10 +661,11 @@ class App:
                 self.shift_btn.configure(bg=shift_color)
             
         caps_color = config.ACCENT_COLOR if self.caps_active else "#252526"
-        if hasattr(self, 'caps_btn'): self.caps_btn.configure(bg=caps_color)
+        if self.caps_btn: self.caps_btn.configure(bg=caps_color)
 
     def type_letter(self, char, force_upper=False):
         self.last_interaction = time.time()
+        self.ignore_next_keypress = True
         final_char = char
         if force_upper: final_char = char.upper()
         else:
@@ -374,8 +675,24 @@ class App:
                     self.shift_active = False
                     self.update_keyboard_visuals()
             else: final_char = char.lower()
-        try: pyautogui.write(final_char)
-        except: pass
+        try: self.injector.write(final_char)
+        except Exception: diagnostics.swallowed("main.type_letter")
+        if self.completer:
+            self.completer.push(final_char)
+            self.runtime.update_suggestions()
+        self.after(100, lambda: setattr(self, 'ignore_next_keypress', False))
+
+    def update_suggestions(self):
+        if not self.is_keyboard_view: return
+        words = self.completer.suggestions() if self.completer else []
+        for i, btn in enumerate(self.suggestion_btns):
+            btn.configure(text=words[i] if i < len(words) else "")
+
+    def accept_suggestion(self, i):
+        if not self.completer: return
+        rest = self.completer.accept(i)
+        if rest: self.virtual_key_action_text(rest + " ")
+        self.runtime.update_suggestions()
 
     def toggle_shift(self):
         self.shift_active = not self.shift_active
@@ -389,21 +706,47 @@ class App:
 
     def virtual_key_action_text(self, text):
         self.last_interaction = time.time()
-        try: pyautogui.write(text)
-        except: pass
+        self.ignore_next_keypress = True
+        if self.completer: self.completer.commit(); self.runtime.update_suggestions()
+        try: self.injector.write(text)
+        except Exception: diagnostics.swallowed("main.virtual_key_action_text")
+        self.after(100, lambda: setattr(self, 'ignore_next_keypress', False))
+
+    def on_configure(self, e):
+        """ The root's <Configure> also sees every child's, so one handler keeps all hit-test rectangles current
+        and pointer handlers never have to ask Tk where things are. """
+        if e.widget is self.root: self.geo['window'] = (e.x, e.y, e.width, e.height)
+        elif e.widget is self.media_frame or e.widget is self.keys_container:
+            # Only fires when the layout reflows, so the two position queries here are rare
+            name = 'media' if e.widget is self.media_frame else 'keys'
+            self.geo[name] = (e.widget.winfo_rootx() - self.root.winfo_rootx(),
+                              e.widget.winfo_rooty() - self.root.winfo_rooty(), e.width, e.height)
+
+    def hit(self, name, x, y):
+        """ Is screen point (x, y) inside the cached rectangle `name` (and the window)? """
+        wx, wy, ww, wh = self.geo['window']
+        if not (wx <= x <= wx + ww and wy <= y <= wy + wh): return False
+        if name == 'window': return True
+        rx, ry, rw, rh = self.geo[name]
+        return wx + rx <= x <= wx + rx + rw and wy + ry <= y <= wy + ry + rh
+
+    def key_at(self, x, y):
+        """ Index of the layout key under screen point (x, y), from the cached keys area and the model's rects. """
+        if not self.hit('keys', x, y): return None
+        wx, wy = self.geo['window'][:2]
+        rx, ry, rw, rh = self.geo['keys']
+        key = hit_test(self.layout, (x - wx - rx) / (rw or 1), (y - wy - ry) / (rh or 1))
+        return self.layout.keys.index(key) if key else None
 
     def on_mouse_scroll(self, event):
-        try:
-            mx, my = self.root.winfo_pointerxy()
-            fx = self.media_frame.winfo_rootx(); fy = self.media_frame.winfo_rooty()
-            fw = self.media_frame.winfo_width(); fh = self.media_frame.winfo_height()
-            if fx <= mx <= fx + fw and fy <= my <= fy + fh:
-                self.last_interaction = time.time()
-                if event.delta > 0: self.virtual_key_action('volumeup')
-                else: self.virtual_key_action('volumedown')
-        except: pass
+        self.record('scroll', event.x_root, event.y_root, event.delta)
+        if self.hit('media', event.x_root, event.y_root):
+            self.last_interaction = time.time()
+            if event.delta > 0: self.virtual_key_action('volumeup')
+            else: self.virtual_key_action('volumedown')
 
     def on_middle_click(self, event):
+        self.record('tap', 'middle')
         self.last_interaction = time.time()
         self.virtual_key_action_hotkey('shift', 'enter')
 
@@ -417,13 +760,22 @@ class App:
         self.bind_drag(self.expand_btn)
 
     def show_audio_menu(self):
-        devices = self.audio_switcher.get_devices()
-        current = self.audio_switcher.get_current_device_id()
+        # The worker owns the only switcher, so the table and the switch both stay off the Tk thread
+        self.audio_worker.menu_items(lambda items: items and self.after(0, lambda: self.open_audio_menu(*items)))
+
+    def open_audio_menu(self, devices, current):
         if not devices: return
         x = self.audio_btn_widget.winfo_rootx()
         y = self.audio_btn_widget.winfo_rooty() + self.audio_btn_widget.winfo_height() + 5
         if y + 150 > self.root.winfo_screenheight(): y = self.audio_btn_widget.winfo_rooty() - 150
-        ModernMenu(self.root, x, y, devices, current, self.audio_switcher.set_default_device)
+        ModernMenu(self.root, x, y, devices, current, self.audio_worker.switch_to)
+
+    def show_toast(self, text):
+        if not hasattr(self, 'toast'): self.toast = Toast(self.root)
+        x = self.root.winfo_rootx()
+        y = self.root.winfo_rooty() + self.root.winfo_height() + 6
+        if y + 40 > self.root.winfo_screenheight(): y = self.root.winfo_rooty() - 40
+        self.toast.show(text, x, y)
 
     def bind_drag(self, widget):
         widget.bind("<ButtonPress-1>", self.start_move)
@@ -431,62 +783,54 @@ class App:
         widget.bind("<ButtonRelease-1>", self.stop_move)
 
     def on_physical_keypress(self, event):
-        if self.ignore_next_keypress: return
-        if self.root.state() == 'withdrawn': return
-        if self.hide_on_type and not self.is_docked:
-            self.root.after(0, self.dock_window)
+        if not self.visible: return
+        if self.runtime.hide_on_type and not self.is_docked:
+            self.after(0, self.dock_window)
 
     def virtual_key_action(self, key):
         self.last_interaction = time.time()
         self.ignore_next_keypress = True 
-        try: pyautogui.press(key)
-        except: pass
-        self.root.after(100, lambda: setattr(self, 'ignore_next_keypress', False))
-
-    def virtual_key_action_hotkey(self, mod, key):
+        try: self.injector.press(key)
+        except Exception: diagnostics.swallowed("main.virtual_key_action")
+        if self.completer and key not in MEDIA_KEYS:
+            if key == 'backspace': self.completer.pop()
+            elif key == 'space': self.completer.commit()
+            else: self.completer.reset()
+            self.runtime.update_suggestions()
+        self.after(100, lambda: setattr(self, 'ignore_next_keypress', False))
+
+    def virtual_key_action_hotkey(self, *keys):
         self.last_interaction = time.time()
         self.ignore_next_keypress = True 
-        try: pyautogui.hotkey(mod, key)
-        except: pass
-        self.root.after(100, lambda: setattr(self, 'ignore_next_keypress', False))
-
-    def timer_loop(self):
-        while not self.stop_threads:
-            if self.root.state() == 'withdrawn':
-                time.sleep(1)
-                continue
-            try:
-                mx, my = self.root.winfo_pointerxy()
-                wx, wy = self.root.winfo_rootx(), self.root.winfo_rooty()
-                ww, wh = self.root.winfo_width(), self.root.winfo_height()
-                if wx <= mx <= wx+ww and wy <= my <= wy+wh:
-                    self.last_interaction = time.time()
-                    self.docking_paused = False
-            except: pass
-            
-            time_since_interaction = time.time() - self.last_interaction
-            time_since_emoji = time.time() - self.emoji_panel_open_time
-            if not self.is_docked and time_since_interaction > self.timeout:
-                if time_since_emoji > 15: 
-                    if self.timeout < 9000: self.root.after(0, self.dock_window)
-            time.sleep(0.5)
-
-    def dock_window(self, animate=True):
-        if not self.is_docked:
-            if self.root.winfo_width() > 100: self.saved_geometry = self.root.geometry()
+        try: self.injector.hotkey(*keys)
+        except Exception: diagnostics.swallowed("main.virtual_key_action_hotkey")
+        if self.completer: self.completer.reset(); self.runtime.update_suggestions()
+        self.after(100, lambda: setattr(self, 'ignore_next_keypress', False))
+
+    def check_idle(self):
+        """ Called from the runtime's timer thread twice a second. """
+        if not self.visible: return
+        pos = get_cursor_pos()
+        if pos and self.hit('window', *pos):
+            self.last_interaction = time.time()
+            self.docking_paused = False
+        
+        timeout = self.runtime.timeout
+        time_since_interaction = time.time() - self.last_interaction
+        time_since_emoji = time.time() - self.emoji_panel_open_time
+        if not self.is_docked and time_since_interaction > timeout:
+            if time_since_emoji > 15 and not self.emoji_picker: 
+                if timeout < 9000: self.after(0, self.dock_window)
+
+    def dock_window(self, animate=True, snap=False):
+        if snap: self.last_dock_geo = None
         mon = get_monitor_info(self.root.winfo_id())
         if not mon: mon = {'l': 0, 't': 0, 'r': self.root.winfo_screenwidth(), 'b': self.root.winfo_screenheight()}
         
-        if self.always_default_dock:
+        if self.runtime.always_default_dock:
             target_x = mon['l'] + 100; target_y = mon['t']; mode = 'top'
         elif self.last_dock_geo:
-            if animate: return self.animate_to_dock_string(self.last_dock_geo)
-            else:
-                self.is_docked = True
-                self.main_frame.pack_forget(); self.dock_frame.pack(fill='both', expand=True)
-                self.expand_btn.config(text="—" if "80x20" in self.last_dock_geo else "│")
-                self.root.geometry(self.last_dock_geo)
-                return
+            return self.dock_to(self.last_dock_geo, animate=animate)
         else:
             mx, my = self.root.winfo_pointerxy()
             dl, dt = mx - mon['l'], my - mon['t']
@@ -498,28 +842,27 @@ class App:
         self.set_dock(mode, target_x, target_y, animate=animate)
 
     def set_dock(self, mode, x, y, animate=True):
-        self.is_docked = True
-        self.main_frame.pack_forget()
-        self.dock_frame.pack(fill='both', expand=True)
         w, h = (80, 20) if mode == 'top' else (20, 80)
         fx, fy = (x - 40, y) if mode == 'top' else (x if mode == 'left' else x-20, y-40)
-        self.expand_btn.config(text="—" if mode == 'top' else "│")
-        dock_geo = f"{w}x{h}+{fx}+{fy}"
-        self.last_dock_geo = dock_geo 
-        if animate: self.animate(self.root.geometry(), dock_geo)
-        else: self.root.geometry(dock_geo)
-        self.save_config()
+        self.dock_to(f"{w}x{h}+{fx}+{fy}", animate=animate)
 
-    def animate_to_dock_string(self, geo_str):
+    def dock_to(self, dock_geo, animate=True):
+        # The resolved geometry is what gets recorded, so a replay never depends on where the pointer is
+        self.record('dock', dock_geo)
+        if not self.is_docked:
+            if self.root.winfo_width() > 100: self.saved_geometry = self.root.geometry()
         self.is_docked = True
         self.main_frame.pack_forget()
         self.dock_frame.pack(fill='both', expand=True)
-        if "80x20" in geo_str: self.expand_btn.config(text="—")
-        else: self.expand_btn.config(text="│")
-        self.animate(self.root.geometry(), geo_str)
+        self.expand_btn.config(text="—" if dock_geo.startswith("80x20") else "│")
+        self.last_dock_geo = dock_geo
+        if animate: self.animate(self.root.geometry(), dock_geo)
+        else: self.root.geometry(dock_geo)
+        self.save_config()
 
     def undock_window(self):
         if not self.is_docked: return
+        self.record('undock')
         self.is_docked = False
         self.dock_frame.pack_forget()
         self.main_frame.pack(fill='both', expand=True)
@@ -530,15 +873,19 @@ class App:
     def animate_resize(self, target_w, target_h):
         cur_w = self.root.winfo_width(); cur_h = self.root.winfo_height()
         cur_x = self.root.winfo_x(); cur_y = self.root.winfo_y()
-        steps = 15; dt = 10 
+        steps = motion.policy.steps(15); dt = 10 
+        if not steps:
+            self.root.geometry(f"{target_w}x{target_h}+{cur_x}+{cur_y}"); return
+        clock = motion.policy.clock(dt)
         def _step(i):
+            clock.tick()
             progress = i / steps
             ease = 1 - (1 - progress) ** 2 
             new_w = int(cur_w + (target_w - cur_w) * ease)
             new_h = int(cur_h + (target_h - cur_h) * ease)
             self.root.geometry(f"{new_w}x{new_h}+{cur_x}+{cur_y}")
-            if i < steps: self.root.after(dt, lambda: _step(i + 1))
-            else: self.root.geometry(f"{target_w}x{target_h}+{cur_x}+{cur_y}")
+            if i < steps: self.after(dt, lambda: _step(i + 1))
+            else: self.root.geometry(f"{target_w}x{target_h}+{cur_x}+{cur_y}"); clock.done()
         _step(0) 
     
     def animate(self, s_geo, e_geo):
@@ -546,24 +893,34 @@ class App:
         try:
             sw, sh, sx, sy = parse(s_geo)
             ew, eh, ex, ey = parse(e_geo)
-        except: return
-        steps = 12
+        except Exception:
+            diagnostics.swallowed("main.animate")
+            return
+        steps = motion.policy.steps(12)
+        if not steps:
+            self.root.geometry(e_geo); return
+        clock = motion.policy.clock(10)
         def step(i):
-            if i > steps: self.root.geometry(e_geo); return
+            clock.tick()
+            if i > steps: self.root.geometry(e_geo); clock.done(); return
             t = i/steps
             self.root.geometry(f"{int(sw+(ew-sw)*t)}x{int(sh+(eh-sh)*t)}+{int(sx+(ex-sx)*t)}+{int(sy+(ey-sy)*t)}")
-            self.root.after(10, lambda: step(i+1))
+            self.after(10, lambda: step(i+1))
         step(0)
 
-    def start_move(self, e): self.dx, self.dy = e.x, e.y; self.drag_start_x = self.root.winfo_x(); self.drag_start_y = self.root.winfo_y()
-    def do_move(self, e): self.root.geometry(f"+{self.root.winfo_x() + e.x - self.dx}+{self.root.winfo_y() + e.y - self.dy}")
+    def start_move(self, e):
+        self.press_x, self.press_y = e.x_root, e.y_root
+        self.drag_start_x, self.drag_start_y = self.geo['window'][:2]
+    def drag_pos(self, e): return self.drag_start_x + e.x_root - self.press_x, self.drag_start_y + e.y_root - self.press_y
+    def do_move(self, e): self.root.geometry("+%d+%d" % self.drag_pos(e))
     def stop_move(self, e):
-        if ((self.root.winfo_x()-self.drag_start_x)**2 + (self.root.winfo_y()-self.drag_start_y)**2)**0.5 < 5: return
+        x, y = self.drag_pos(e)
+        if ((x-self.drag_start_x)**2 + (y-self.drag_start_y)**2)**0.5 < 5: return
+        self.record('move', x, y)
         mon = get_monitor_info(self.root.winfo_id())
         if not mon: mon = {'l': 0, 't': 0, 'r': self.root.winfo_screenwidth(), 'b': self.root.winfo_screenheight()}
-        x, y = self.root.winfo_x(), self.root.winfo_y()
         if x < mon['l']+config.SNAP_THRESHOLD or x > mon['r']-config.SNAP_THRESHOLD or y < mon['t']+config.SNAP_THRESHOLD: 
-            self.last_dock_geo = None; self.dock_window()
+            self.dock_window(snap=True)
         else: self.save_config()
 
     def start_resize(self, e):
@@ -575,89 +932,78 @@ class App:
         if new_w > config.MIN_WIDTH and new_h > config.MIN_HEIGHT:
             self.root.geometry(f"{new_w}x{new_h}")
             self.root.update_idletasks()
-    def stop_resize(self, e): self.save_config()
+    def stop_resize(self, e):
+        self.record('resize', self.root.winfo_width(), self.root.winfo_height())
+        self.save_config()
 
-    def set_timeout(self, seconds): self.timeout = seconds; self.save_config()
     def reset_size(self): self.root.geometry(f"{config.DEFAULT_WIDTH}x{config.DEFAULT_HEIGHT}"); self.save_config()
     def hide_window(self): self.root.withdraw()
 
     def setup_context_menu(self):
         self.context_menu = tk.Menu(self.root, tearoff=0, bg=config.BG_COLOR, fg=config.TXT_COLOR)
+        runtime = self.runtime
         self.time_menu = tk.Menu(self.context_menu, tearoff=0, bg=config.BG_COLOR, fg=config.TXT_COLOR)
-        self.time_menu.add_command(label="5 Seconds", command=lambda: self.set_timeout(5))
-        self.time_menu.add_command(label="10 Seconds", command=lambda: self.set_timeout(10))
-        self.time_menu.add_command(label="Never Auto-Hide", command=lambda: self.set_timeout(99999))
-        self.hide_on_type_var = tk.BooleanVar(value=self.hide_on_type)
-        self.always_default_dock_var = tk.BooleanVar(value=self.always_default_dock)
-        self.context_menu.add_checkbutton(label="Auto-Dock on Typing", variable=self.hide_on_type_var, command=self.update_preferences)
-        self.context_menu.add_checkbutton(label="Always Dock to Top-Left", variable=self.always_default_dock_var, command=self.update_preferences)
+        self.time_menu.add_command(label="5 Seconds", command=lambda: runtime.set_timeout(5))
+        self.time_menu.add_command(label="10 Seconds", command=lambda: runtime.set_timeout(10))
+        self.time_menu.add_command(label="Never Auto-Hide", command=lambda: runtime.set_timeout(99999))
+        self.context_menu.add_checkbutton(label="Auto-Dock on Typing", variable=runtime.hide_on_type_var, command=runtime.update_preferences)
+        self.context_menu.add_checkbutton(label="Always Dock to Top-Left", variable=runtime.always_default_dock_var, command=runtime.update_preferences)
+        self.context_menu.add_checkbutton(label="No Animations", variable=runtime.no_animation_var, command=runtime.update_preferences)
         self.context_menu.add_separator()
         self.context_menu.add_cascade(label="Auto-Dock Timer", menu=self.time_menu)
         self.context_menu.add_command(label="Hide to Tray", command=self.hide_window)
         self.context_menu.add_command(label="Reset Size", command=self.reset_size)
+        self.recording_var = tk.BooleanVar(value=False)
+        self.context_menu.add_checkbutton(label="Record Session", variable=self.recording_var, command=self.toggle_recording)
+        self.context_menu.add_checkbutton(label="Performance HUD", variable=runtime.hud_var, command=lambda: runtime.toggle_hud(self))
+        self.macro_menu = tk.Menu(self.context_menu, tearoff=0, bg=config.BG_COLOR, fg=config.TXT_COLOR)
+        self.refresh_macro_menu()
+        self.context_menu.add_cascade(label="Macros", menu=self.macro_menu)
         self.context_menu.add_separator()
-        self.context_menu.add_command(label="Quit", command=self.quit_app)
+        if self.root is not runtime.root: self.context_menu.add_command(label="Close Pad", command=lambda: runtime.close_pad(self))
+        self.context_menu.add_command(label="Quit", command=runtime.quit_app)
         self.root.bind("<Button-3>", lambda e: self.context_menu.tk_popup(e.x_root, e.y_root))
 
-    def setup_tray(self):
-        menu = TrayMenu(TrayItem('Show', self.show_from_tray, default=True), 
-                        TrayItem('Dock to Default', self.force_default_dock),
-                        TrayItem('Quit', self.quit_app))
-        img = Image.new('RGB', (64,64), (30,30,30)); d = ImageDraw.Draw(img)
-        d.rectangle([16,26,48,38], fill="white")
-        self.tray = TrayIcon("FloatPad", img, "FloatPad", menu)
-        self.tray.run()
-
-    def show_from_tray(self, icon=None, item=None):
-        self.root.after(0, self.root.deiconify)
-        self.root.after(10, self.root.lift)
-        self.root.after(20, lambda: self.dock_window(animate=False))
-        self.root.after(50, self.vibrate_eye_catch)
+    def show_from_tray(self):
+        self.after(0, self.root.deiconify)
+        self.after(10, self.root.lift)
+        self.after(20, lambda: self.dock_window(animate=False))
+        self.after(50, self.vibrate_eye_catch)
 
     def vibrate_eye_catch(self):
         orig_geo = self.root.geometry()
         try:
             parts = orig_geo.replace('+', 'x').split('x')
             w, h, x, y = map(int, parts)
-            offsets = [5, -5, 4, -4, 2, -2, 0]
+            offsets = {motion.FULL: [5, -5, 4, -4, 2, -2, 0], motion.REDUCED: [4, -4, 0]}.get(motion.policy.mode)
+            if not offsets: return
+            clock = motion.policy.clock(30)
             def do_shake(index):
+                clock.tick()
                 if index < len(offsets):
                     new_x = x + offsets[index]
                     self.root.geometry(f"{w}x{h}+{new_x}+{y}")
-                    self.root.after(30, lambda: do_shake(index + 1))
-                else: self.root.geometry(orig_geo)
+                    self.after(30, lambda: do_shake(index + 1))
+                else: self.root.geometry(orig_geo); clock.done()
             do_shake(0)
-        except: pass
+        except Exception: diagnostics.swallowed("main.vibrate_eye_catch")
 
-    def save_config(self):
-        if not self.is_docked: self.settings["geometry"] = self.root.geometry()
-        self.settings.update({
-            "timeout": self.timeout, "hide_on_type": self.hide_on_type,
-            "always_default_dock": self.always_default_dock, "last_dock_geo": self.last_dock_geo
-        })
-        config.save_config_file(self.settings)
-    
-    def quit_app(self, *args):
-        self.save_config()
-        self.stop_threads = True
-        try: keyboard.unhook_all()
-        except: pass
-        try: self.tray.stop()
-        except: pass
-        try: self.root.quit(); self.root.destroy()
-        except: pass
-        os._exit(0)
+    def store_state(self):
+        if not self.is_docked: self.pad_settings["geometry"] = self.root.geometry()
+        self.pad_settings["last_dock_geo"] = self.last_dock_geo
+
+    def save_config(self): self.runtime.save_config()
     
-    def force_default_dock(self, icon=None, item=None):
-        self.root.after(0, self.root.deiconify)
-        self.root.after(10, self.root.lift)
+    def force_default_dock(self, offset=0):
+        self.after(0, self.root.deiconify)
+        self.after(10, self.root.lift)
         mon = get_monitor_info(self.root.winfo_id())
         if not mon: mon = {'l': 0, 't': 0}
-        target_x = mon['l'] + 100; target_y = mon['t']
-        self.root.after(20, lambda: self.set_dock('top', target_x, target_y, animate=False))
-        self.root.after(50, self.vibrate_eye_catch)
+        target_x = mon['l'] + 100 + offset; target_y = mon['t']
+        self.after(20, lambda: self.set_dock('top', target_x, target_y, animate=False))
+        self.after(50, self.vibrate_eye_catch)
 
 if __name__ == "__main__":
-    app = App()
-    try: app.root.mainloop()
-    except KeyboardInterrupt: app.quit_app()
\ No newline at end of file
+    runtime = Runtime()
+    try: runtime.root.mainloop()
+    except KeyboardInterrupt: runtime.quit_app()
\ No newline at end of file
@@ -0,0 +1,79 @@
+""" Adaptive animation budget: measures how late animation frames land and scales animations down
+(full -> reduced -> off) when they overrun, stepping back up once frames are on time again. """
+import time
+
+import config
+
+FULL, REDUCED, OFF = "full", "reduced", "off"
+LADDER = (FULL, REDUCED, OFF)
+
+class FrameClock:
+    """ Tracks one running animation; call tick() at the top of every frame and done() after the last. """
+    def __init__(self, policy, dt_ms):
+        self.policy = policy
+        self.dt = dt_ms / 1000.0
+        self.last = None
+        self.frames = 0
+        self.overruns = 0
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last is not None:
+            late = (now - self.last) - self.dt
+            self.frames += 1
+            self.policy.frames += 1
+            if late > self.policy.worst_late: self.policy.worst_late = late
+            self.policy.last_frame = now - self.last
+            if late > config.MOTION_OVERRUN:
+                self.overruns += 1; self.policy.overruns += 1
+        self.last = now
+
+    def done(self):
+        if self.frames: self.policy.adapt(self.overruns / self.frames)
+
+class MotionPolicy:
+    def __init__(self):
+        self.setting = "auto"   # "auto" adapts; "off" never animates
+        self.auto_mode = FULL
+        self.remote = False
+        self.overrun_ewma = 0.0
+        self.frames = 0
+        self.overruns = 0
+        self.worst_late = 0.0
+        self.last_frame = 0.0
+        self.skipped = 0
+
+    def configure(self, setting, remote=False):
+        self.setting = setting
+        self.remote = remote
+        if remote and self.auto_mode == FULL: self.auto_mode = REDUCED  # Every geometry change crosses the wire
+
+    @property
+    def mode(self): return OFF if self.setting == "off" else self.auto_mode
+
+    def steps(self, full_steps):
+        """ How many frames an animation designed for full_steps should use; 0 means jump to the end. """
+        mode = self.mode
+        if mode == OFF:
+            self.skipped += 1
+            # Nothing gets measured while animations are off, so periodically probe with a reduced one
+            if self.setting == "auto" and self.skipped % config.MOTION_PROBE_EVERY == 0: self.auto_mode = REDUCED
+            return 0
+        if mode == REDUCED: return max(2, full_steps // 3)
+        return full_steps
+
+    def clock(self, dt_ms): return FrameClock(self, dt_ms)
+
+    def adapt(self, overrun_fraction):
+        self.overrun_ewma = 0.7 * self.overrun_ewma + 0.3 * overrun_fraction
+        i = LADDER.index(self.auto_mode)
+        if self.overrun_ewma > config.MOTION_DEGRADE_AT and i < len(LADDER) - 1: self.auto_mode = LADDER[i + 1]
+        elif self.overrun_ewma < config.MOTION_RESTORE_AT and i > 0:
+            if not (self.remote and LADDER[i - 1] == FULL): self.auto_mode = LADDER[i - 1]
+
+    def stats(self):
+        return {'mode': self.mode, 'setting': self.setting, 'remote_session': self.remote,
+                'frames': self.frames, 'overruns': self.overruns, 'overrun_ewma': round(self.overrun_ewma, 3),
+                'worst_late_ms': round(self.worst_late * 1000, 1), 'skipped_animations': self.skipped}
+
+policy = MotionPolicy()
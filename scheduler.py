@@ -0,0 +1,108 @@
+import math
+import time
+
+import config
+import diagnostics
+
+class Scheduler:
+    """ Owns every pending repeat/long-press/macro deadline behind a single Tk timer.
+    Deadlines are absolute time.perf_counter() values, so a slow callback never pushes
+    the following ones back. """
+    def __init__(self, widget):
+        self.widget = widget
+        self.jobs = {}  # token -> (deadline, callback)
+        self.next_token = 1
+        self.after_id = None
+        self.armed_for = None
+        self.repeat_stats = {'target_hz': 0.0, 'achieved_hz': 0.0, 'repeats': 0, 'skipped': 0}
+
+    def call_at(self, deadline, callback):
+        token = self.next_token; self.next_token += 1
+        self.jobs[token] = (deadline, callback)
+        if self.armed_for is None or deadline < self.armed_for: self._arm()
+        return token
+
+    def call_later(self, delay, callback): return self.call_at(time.perf_counter() + delay, callback)
+
+    def cancel(self, token):
+        if token is None: return
+        if isinstance(token, Repeat): token.stop(); return
+        self.jobs.pop(token, None)
+        if not self.jobs and self.after_id:
+            self.widget.after_cancel(self.after_id); self.after_id = None; self.armed_for = None
+
+    def start_repeat(self, callback, delay, interval, accelerate=False):
+        return Repeat(self, callback, delay, interval, accelerate)
+
+    def _arm(self):
+        if self.after_id: self.widget.after_cancel(self.after_id)
+        self.after_id = None; self.armed_for = None
+        if not self.jobs: return
+        deadline = min(d for d, _ in self.jobs.values())
+        # Round up: a truncated delay fires early, finds nothing due and re-arms at 0 until the deadline
+        ms = max(0, math.ceil((deadline - time.perf_counter()) * 1000))
+        self.armed_for = deadline
+        self.after_id = self.widget.after(ms, self._tick)
+
+    def _tick(self):
+        self.after_id = None; self.armed_for = None
+        now = time.perf_counter()
+        due = sorted((d, t) for t, (d, _) in self.jobs.items() if d <= now)
+        for _, token in due:
+            job = self.jobs.pop(token, None)
+            if job:
+                try: job[1]()
+                except Exception: diagnostics.swallowed("scheduler.job")
+        self._arm()
+
+class Repeat:
+    """ Fires on a fixed grid anchored to the first deadline; late slots are dropped, not queued. """
+    def __init__(self, scheduler, callback, delay, interval, accelerate):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.interval = interval
+        self.accelerate = accelerate
+        self.count = 0
+        self.stopped = False
+        self.first_fire = self.last_fire = None
+        self.pending = 0.0
+        self.pending_slots = 0
+        self.target_total = 0.0
+        self.target_slots = 0  # Nominal slots in target_total, dropped ones included
+        self.deadline = time.perf_counter() + delay
+        self.token = scheduler.call_at(self.deadline, self.fire)
+
+    def current_interval(self):
+        if not self.accelerate: return self.interval
+        return max(config.REPEAT_MIN_INTERVAL, self.interval * config.REPEAT_ACCEL ** self.count)
+
+    def fire(self):
+        self.last_fire = time.perf_counter()
+        if self.first_fire is None: self.first_fire = self.last_fire
+        else: self.target_total += self.pending; self.target_slots += self.pending_slots
+        self.callback()
+        self.count += 1
+        if self.stopped: return
+        step = self.current_interval()
+        self.deadline += step; self.pending = step; self.pending_slots = 1
+        now = time.perf_counter()
+        while self.deadline <= now:
+            self.deadline += step; self.pending += step; self.pending_slots += 1
+            self.scheduler.repeat_stats['skipped'] += 1
+        self.token = self.scheduler.call_at(self.deadline, self.fire)
+
+    def stop(self):
+        if self.stopped: return
+        self.stopped = True
+        self.scheduler.cancel(self.token)
+        if self.count > 1 and self.target_total:
+            stats = self.scheduler.repeat_stats
+            stats['target_hz'] = round(self.target_slots / self.target_total, 2)
+            stats['achieved_hz'] = round((self.count - 1) / max(1e-6, self.last_fire - self.first_fire), 2)
+            stats['repeats'] += self.count
+
+def get_scheduler(widget):
+    """ One scheduler per Tk interpreter, shared by every button. """
+    root = widget._root()
+    if not hasattr(root, 'pad_scheduler'): root.pad_scheduler = Scheduler(root)
+    return root.pad_scheduler
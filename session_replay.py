@@ -0,0 +1,166 @@
+""" Records pad-level events and replays them against fake backends.
+Usage: python session_replay.py SESSION.fps [--speed N] [--json OUT]   (--speed 0 = as fast as possible) """
+import gzip
+import json
+import sys
+import time
+from collections import namedtuple
+
+import diagnostics
+
+MAGIC = "FPSESSION 1"
+Event = namedtuple('Event', 't kind args')  # t = seconds since the recording started
+
+class SessionRecorder:
+    """ One gzip'd tab-separated line per event: microseconds, kind, args. """
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        self.file.write(MAGIC + "\n")
+        self.start = time.monotonic_ns()
+
+    def log(self, kind, *args):
+        dt_us = (time.monotonic_ns() - self.start) // 1000
+        self.file.write("\t".join([str(dt_us), kind, *map(str, args)]) + "\n")
+
+    def close(self):
+        try: self.file.close()
+        except Exception: diagnostics.swallowed("session.close")
+
+def load_session(path):
+    events = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        if f.readline().rstrip("\n") != MAGIC: raise ValueError(f"Not a session recording: {path}")
+        for line in f:
+            dt, kind, *args = line.rstrip("\n").split("\t")
+            events.append(Event(int(dt) / 1e6, kind, tuple(args)))
+    return events
+
+class FakeInjector:
+    """ Stands in for Injector; counts what would have been typed. """
+    def __init__(self): self.calls = []
+    def press(self, key): self.calls.append(('press', key))
+    def hotkey(self, *keys): self.calls.append(('hotkey', '+'.join(keys)))
+    def write(self, text): self.calls.append(('write', text))
+    def send(self, combo): self.calls.append(('send', combo))
+
+class FakeAudio:
+    """ Stands in for AudioSwitcher with two fixed devices. """
+    def __init__(self):
+        self.devices = [{'name': 'Speakers (Fake)', 'id': 'fake-speakers'}, {'name': 'Headset (Fake)', 'id': 'fake-headset'}]
+        self.current = 'fake-speakers'
+    def get_devices(self): return list(self.devices)
+    def get_current_device_id(self): return self.current
+    def set_default_device(self, device_id):
+        self.current = device_id
+        return True
+
+FakeEvent = namedtuple('FakeEvent', 'x_root y_root delta')
+
+def summarize(samples):
+    if not samples: return {'count': 0}
+    s = sorted(samples)
+    ms = lambda v: round(v * 1000, 3)
+    return {'count': len(s), 'mean': ms(sum(s) / len(s)), 'p50': ms(s[len(s) // 2]),
+            'p95': ms(s[min(len(s) - 1, int(len(s) * 0.95))]), 'max': ms(s[-1])}
+
+class Replayer:
+    """ Feeds recorded events into a live pad on its own Tk loop, timing each handler. """
+    def __init__(self, app, events, speed=1.0, settle_ms=500):
+        self.app = app
+        self.events = events
+        self.speed = speed
+        self.settle_ms = settle_ms
+        self.latency = {}
+        self.lateness = []
+        self.missing = 0
+        self.i = 0
+
+    def handle(self, ev):
+        app, kind, args = self.app, ev.kind, ev.args
+        if kind == 'start':
+            geometry, docked, layout = args[:3]
+            dock_geo = args[3] if len(args) > 3 else ''
+            while app.layout.name != layout and len(app.layout_order) > 1:
+                if layout not in app.layout_order: break
+                app.toggle_input_view()
+            if docked == '1':
+                if dock_geo: app.dock_to(dock_geo, animate=False)
+                else: app.dock_window(animate=False)
+                app.saved_geometry = geometry
+            else:
+                app.saved_geometry = geometry
+                app.undock_window()
+        elif kind in ('tap', 'repeat', 'hold'):
+            if args[0] == 'middle': app.on_middle_click(None); return
+            fn = app.commands.get((args[0], kind))
+            if fn: fn()
+            else: self.missing += 1
+        elif kind == 'scroll': app.on_mouse_scroll(FakeEvent(int(args[0]), int(args[1]), int(args[2])))
+        elif kind == 'move': app.root.geometry(f"+{args[0]}+{args[1]}")
+        elif kind == 'resize': app.root.geometry(f"{args[0]}x{args[1]}")
+        elif kind == 'dock':
+            # Older recordings only hold the snap flag; newer ones hold the geometry the pad docked to
+            if args[0] in ('0', '1'): app.dock_window(snap=args[0] == '1')
+            else: app.dock_to(args[0], animate=False)
+        elif kind == 'undock': app.undock_window()
+        elif kind == 'view': app.toggle_input_view()
+        else: self.missing += 1
+
+    def pump(self):
+        now = time.perf_counter()
+        while self.i < len(self.events):
+            ev = self.events[self.i]
+            due = self.start + ev.t / self.speed if self.speed > 0 else now
+            if due > now:
+                self.app.root.after(max(1, int((due - now) * 1000)), self.pump)
+                return
+            t0 = time.perf_counter()
+            self.handle(ev)
+            self.app.root.update_idletasks()
+            now = time.perf_counter()
+            self.latency.setdefault(ev.kind, []).append(now - t0)
+            self.lateness.append(t0 - due)
+            self.i += 1
+        self.app.root.after(self.settle_ms, self.app.root.quit)
+
+    def run(self):
+        # Let the app's own startup (initial dock) settle before the clock starts.
+        def begin():
+            self.start = time.perf_counter()
+            self.pump()
+        self.app.root.after(self.settle_ms, begin)
+        self.app.root.mainloop()
+        return self.report(time.perf_counter() - self.start)
+
+    def report(self, wall):
+        app = self.app
+        injected = {}
+        for op, _ in getattr(app.injector, 'calls', []): injected[op] = injected.get(op, 0) + 1
+        return {
+            'events': len(self.events), 'missing': self.missing, 'speed': self.speed, 'wall_s': round(wall, 3),
+            'latency_ms': {kind: summarize(v) for kind, v in sorted(self.latency.items())},
+            'lateness_ms': summarize(self.lateness),
+            'injected': injected,
+            'final': {'docked': app.is_docked, 'layout': app.layout.name, 'geometry': app.root.geometry(),
+                      'shift': app.shift_active, 'caps': app.caps_active, 'playing': app.is_playing,
+                      'audio_device': app.audio_worker.switcher.get_current_device_id()},
+        }
+
+def replay(path, speed=1.0):
+    from main import Runtime
+    app = Runtime(injector=FakeInjector(), audio_switcher=FakeAudio(), background=False, persist=False).pads[0]
+    try: return Replayer(app, load_session(path), speed).run()
+    finally:
+        try: app.root.destroy()
+        except Exception: pass
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args: print(__doc__); sys.exit(1)
+    speed = float(args[args.index('--speed') + 1]) if '--speed' in args else 1.0
+    result = replay(args[0], speed)
+    text = json.dumps(result, indent=2)
+    if '--json' in args:
+        with open(args[args.index('--json') + 1], 'w') as f: f.write(text)
+    print(text)
@@ -1,5 +1,10 @@
+import time
 import tkinter as tk
 import config # Import colors
+import diagnostics
+import motion
+from scheduler import get_scheduler
+from window_utils import get_process_memory
 
 class ToolTip:
     def __init__(self, widget, get_text_func):
@@ -48,23 +53,26 @@ class ToolTip:
                           relief=tk.FLAT, font=("Segoe UI", 9))
         self.label.pack(fill="both", expand=True, ipadx=5, ipady=2)
 
+    def fade_step(self):
+        return {motion.FULL: 0.08, motion.REDUCED: 0.25}.get(motion.policy.mode, 1.0)
+
     def fade_in(self):
         if not self.is_hovering or not self.tip_window: return
         if self.alpha < 1.0:
-            self.alpha += 0.08
+            self.alpha += self.fade_step()
             if self.alpha > 1.0: self.alpha = 1.0
             try: self.tip_window.attributes("-alpha", self.alpha)
-            except: pass
+            except Exception: diagnostics.swallowed("ui.tooltip_fade")
             self.fade_job = self.widget.after(15, self.fade_in)
         else: self.fade_job = None
 
     def fade_out(self):
         if not self.tip_window: return
         if self.alpha > 0.0:
-            self.alpha -= 0.08
+            self.alpha -= self.fade_step()
             if self.alpha < 0.0: self.alpha = 0.0
             try: self.tip_window.attributes("-alpha", self.alpha)
-            except: pass
+            except Exception: diagnostics.swallowed("ui.tooltip_fade")
             self.fade_job = self.widget.after(15, self.fade_out)
         else: self.destroy_window()
 
@@ -83,9 +91,87 @@ class ToolTip:
         if self.fade_job: self.widget.after_cancel(self.fade_job)
         self.alpha = 0.5
         try: self.tip_window.attributes("-alpha", self.alpha)
-        except: pass
+        except Exception: diagnostics.swallowed("ui.tooltip_refresh")
         self.fade_in()
 
+class PerfHud:
+    """ Small always-on-top readout of counters the app already keeps, refreshed every HUD_INTERVAL.
+    It only exists while shown: closing it destroys the window and cancels its timer. """
+    def __init__(self, master, x, y, on_click=None):
+        self.master = master
+        self.tap_latency = None
+        self.lag = 0.0
+        self.worst_lag = 0.0
+        self.window = tk.Toplevel(master)
+        self.window.wm_overrideredirect(True)
+        self.window.attributes("-topmost", True)
+        self.window.attributes("-alpha", 0.9)
+        self.window.wm_geometry(f"+{x}+{y}")
+        border = tk.Frame(self.window, bg="#555555", padx=1, pady=1)
+        border.pack(fill="both", expand=True)
+        self.label = tk.Label(border, bg="#1e1e1e", fg="#98c379", font=("Consolas", 9), justify=tk.LEFT, anchor="w", padx=6, pady=4)
+        self.label.pack(fill="both", expand=True)
+        if on_click: self.label.bind("<Button-1>", lambda e: on_click())
+        self.job = None
+        self.tick(first=True)
+
+    def tap_done(self, started): self.tap_latency = time.perf_counter() - started
+
+    def tick(self, first=False):
+        # Lateness of our own timer is the event-loop lag everything else on the Tk thread sees too
+        if not first:
+            self.lag = max(0.0, time.perf_counter() - self.due)
+            if self.lag > self.worst_lag: self.worst_lag = self.lag
+        self.label.config(text="\n".join(self.lines()))
+        self.due = time.perf_counter() + config.HUD_INTERVAL
+        self.job = self.master.after(int(config.HUD_INTERVAL * 1000), self.tick)
+
+    def lines(self):
+        ms = lambda v: f"{v * 1000:6.1f} ms" if v is not None else "     -"
+        policy = motion.policy
+        out = [f"loop lag {ms(self.lag)}  max {ms(self.worst_lag).strip()}",
+               f"tap->key {ms(self.tap_latency)}",
+               f"frame    {ms(policy.last_frame if policy.frames else None)}  {policy.mode}"]
+        for site in sorted(diagnostics.latest):
+            if site.startswith("audio."): out.append(f"{site[6:22]:<16} {ms(diagnostics.latest[site])}")
+        rss = get_process_memory()
+        out.append(f"rss      {rss / 1048576:6.1f} MB" if rss else "rss           -")
+        return out
+
+    def close(self):
+        if self.job: self.master.after_cancel(self.job); self.job = None
+        self.window.destroy()
+
+class Toast:
+    """ A single reusable confirmation bubble; shown and hidden, never recreated. """
+    def __init__(self, master):
+        self.master = master
+        self.window = None
+        self.hide_job = None
+
+    def show(self, text, x, y, duration=1200):
+        if not self.window:
+            self.window = tk.Toplevel(self.master)
+            self.window.wm_overrideredirect(True)
+            self.window.attributes("-topmost", True)
+            border = tk.Frame(self.window, bg="#555555", padx=1, pady=1)
+            border.pack(fill="both", expand=True)
+            self.label = tk.Label(border, bg="#2b2b2b", fg="#ffffff", font=("Segoe UI", 9), padx=8, pady=4)
+            self.label.pack(fill="both", expand=True)
+        self.label.config(text=text)
+        self.window.wm_geometry(f"+{x}+{y}")
+        self.window.deiconify()
+        if self.hide_job: self.master.after_cancel(self.hide_job)
+        self.hide_job = self.master.after(duration, self.hide)
+
+    def hide(self):
+        self.hide_job = None
+        if self.window: self.window.withdraw()
+
+    def close(self):
+        if self.hide_job: self.master.after_cancel(self.hide_job); self.hide_job = None
+        if self.window: self.window.destroy(); self.window = None
+
 class ModernMenu(tk.Toplevel):
     def __init__(self, master, x, y, items, current_id, callback):
         super().__init__(master)
@@ -130,7 +216,7 @@ class ModernMenu(tk.Toplevel):
 class ModernButton(tk.Label):
     def __init__(self, parent, content, command=None, bg="#333333", hover_bg="#4d4d4d", 
                  fg="#ffffff", font=("Segoe UI", 11), width=5, height=2, 
-                 repeat=False, repeat_command=None, long_press_command=None):
+                 repeat=False, repeat_command=None, long_press_command=None, accelerate=False):
         if isinstance(content, str):
             super().__init__(parent, text=content, bg=bg, fg=fg, font=font, cursor="hand2")
         else:
@@ -142,42 +228,158 @@ class ModernButton(tk.Label):
         self.bg_normal = bg
         self.bg_hover = hover_bg
         self.repeat = repeat
+        self.accelerate = accelerate
+        self.scheduler = get_scheduler(self)
         self.repeat_job = None
+        self.is_pressed = False
         self.is_long_pressed = False
         self.long_press_job = None
         self.bind("<Enter>", self.on_enter)
         self.bind("<Leave>", self.on_leave)
         self.bind("<ButtonPress-1>", self.on_press)
         self.bind("<ButtonRelease-1>", self.on_release)
+        self.bind("<Destroy>", lambda e: self.cancel_jobs(), add="+")
         
+    def cancel_jobs(self):
+        self.scheduler.cancel(self.repeat_job); self.repeat_job = None
+        self.scheduler.cancel(self.long_press_job); self.long_press_job = None
     def on_enter(self, e): self.configure(bg=self.bg_hover)
-    def on_leave(self, e): self.configure(bg=self.bg_normal)
+    def on_leave(self, e):
+        self.configure(bg=self.bg_normal)
+        # Sliding off a held key stops it, and a pending long-press becomes a cancelled tap
+        if self.is_pressed:
+            self.is_pressed = False
+            self.cancel_jobs()
     def on_press(self, e):
         self.configure(bg="#0078d4")
+        self.cancel_jobs()
+        self.is_pressed = True
         self.is_long_pressed = False
         if self.repeat:
             if self.command: self.command()
-            if self.repeat_job: self.after_cancel(self.repeat_job)
-            self.repeat_job = self.after(300, self.do_repeat)
+            if self.repeat_command:
+                self.repeat_job = self.scheduler.start_repeat(self.do_repeat, config.REPEAT_DELAY,
+                                                              config.REPEAT_INTERVAL, self.accelerate)
             return
         if self.long_press_command:
-            self.long_press_job = self.after(400, self.do_long_press)
+            self.long_press_job = self.scheduler.call_later(config.LONG_PRESS_DELAY, self.do_long_press)
             return
         if self.command: self.command()
     def do_repeat(self):
-        if self.repeat_command:
-            self.repeat_command()
-            self.repeat_job = self.after(100, self.do_repeat)
+        if self.repeat_command: self.repeat_command()
     def do_long_press(self):
+        self.long_press_job = None
         self.is_long_pressed = True
         if self.long_press_command:
             self.long_press_command()
             self.configure(bg="#005a9e")
     def on_release(self, e):
-        self.configure(bg=self.bg_hover)
-        if self.repeat_job:
-            self.after_cancel(self.repeat_job); self.repeat_job = None
-        if self.long_press_job:
-            self.after_cancel(self.long_press_job); self.long_press_job = None
-        if self.long_press_command and not self.is_long_pressed:
-            if self.command: self.command()
\ No newline at end of file
+        was_pressed = self.is_pressed
+        self.is_pressed = False
+        self.configure(bg=self.bg_hover if was_pressed else self.bg_normal)
+        self.cancel_jobs()
+        if was_pressed and self.long_press_command and not self.is_long_pressed:
+            if self.command: self.command()
+
+
+class EmojiPicker(tk.Toplevel):
+    """ Search box, recents row and a virtualized glyph grid that only draws the visible rows. """
+    CELL = 34
+    COLS = 8
+    ROWS = 6
+
+    def __init__(self, master, x, y, index, recent, callback):
+        super().__init__(master)
+        self.index = index
+        self.callback = callback
+        self.results = index.all_ids
+        self.offset = 0
+        self.overrideredirect(True)
+        self.configure(bg="#2b2b2b")
+        self.attributes("-topmost", True)
+        self.attributes("-alpha", 0.98)
+        self.border = tk.Frame(self, bg="#444444", padx=1, pady=1)
+        self.border.pack(fill="both", expand=True)
+        self.container = tk.Frame(self.border, bg="#252526")
+        self.container.pack(fill="both", expand=True)
+
+        self.query = tk.StringVar()
+        self.entry = tk.Entry(self.container, textvariable=self.query, bg="#333333", fg="#ffffff",
+                              insertbackground="#ffffff", relief=tk.FLAT, font=("Segoe UI", 10))
+        self.entry.pack(fill="x", padx=6, pady=6, ipady=3)
+
+        self.recent_row = tk.Frame(self.container, bg="#252526")
+        self.recent_row.pack(fill="x", padx=6)
+        for glyph in recent[:self.COLS]:
+            lbl = tk.Label(self.recent_row, text=glyph, font=("Segoe UI Emoji", 13), bg="#252526", fg="#ffffff", cursor="hand2")
+            lbl.pack(side="left", padx=1)
+            lbl.bind("<Button-1>", lambda e, g=glyph: self.pick(g))
+        tk.Frame(self.container, bg="#3e3e42", height=1).pack(fill="x", padx=5, pady=4)
+
+        w, h = self.CELL * self.COLS, self.CELL * self.ROWS
+        self.canvas = tk.Canvas(self.container, width=w, height=h, bg="#252526", highlightthickness=0, cursor="hand2")
+        self.canvas.pack(padx=6)
+        # One item per visible cell (plus a spare row for partial scroll); reused on every scroll and search.
+        self.cells = [self.canvas.create_text(0, 0, text="", font=("Segoe UI Emoji", 15), fill="#ffffff")
+                      for _ in range(self.COLS * (self.ROWS + 1))]
+        self.status = tk.Label(self.container, text="", font=("Segoe UI", 8), bg="#252526", fg="#888888", anchor="w")
+        self.status.pack(fill="x", padx=6, pady=(2, 6))
+
+        self.query.trace_add("write", lambda *a: self.on_search())
+        self.canvas.bind("<MouseWheel>", self.on_scroll)
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Motion>", self.on_motion)
+        self.entry.bind("<Return>", lambda e: self.results and self.pick(self.index.glyph(self.results[0])))
+        self.bind("<Escape>", lambda e: self.destroy())
+        self.bind("<FocusOut>", lambda e: self.after(50, self.check_focus))
+        self.geometry(f"+{x}+{y}")
+        self.render()
+        self.entry.focus_force()
+
+    def check_focus(self):
+        try:
+            if self.focus_get() is None: self.destroy()
+        except Exception: diagnostics.swallowed("ui.emoji_picker_focus")
+
+    def on_search(self):
+        self.results = self.index.search(self.query.get())
+        self.offset = 0
+        self.render()
+
+    def on_scroll(self, e):
+        total_rows = -(-len(self.results) // self.COLS)
+        max_offset = max(0, total_rows * self.CELL - self.ROWS * self.CELL)
+        self.offset = min(max_offset, max(0, self.offset - (e.delta // 120) * self.CELL))
+        self.render()
+
+    def render(self):
+        first_row = self.offset // self.CELL
+        shift = self.offset % self.CELL
+        half = self.CELL // 2
+        for slot, item in enumerate(self.cells):
+            r, c = divmod(slot, self.COLS)
+            i = (first_row + r) * self.COLS + c
+            if i < len(self.results):
+                self.canvas.itemconfigure(item, text=self.index.glyph(self.results[i]))
+                self.canvas.coords(item, c * self.CELL + half, r * self.CELL - shift + half)
+            else:
+                self.canvas.itemconfigure(item, text="")
+        self.status.config(text=f"{len(self.results)} results")
+
+    def cell_at(self, x, y):
+        c = x // self.CELL
+        if not 0 <= c < self.COLS: return None
+        i = ((y + self.offset) // self.CELL) * self.COLS + c
+        return self.results[i] if 0 <= i < len(self.results) else None
+
+    def on_motion(self, e):
+        idx = self.cell_at(e.x, e.y)
+        self.status.config(text=self.index.name(idx) if idx is not None else f"{len(self.results)} results")
+
+    def on_click(self, e):
+        idx = self.cell_at(e.x, e.y)
+        if idx is not None: self.pick(self.index.glyph(idx))
+
+    def pick(self, glyph):
+        self.destroy()
+        self.callback(glyph)
@@ -2,9 +2,14 @@ import ctypes
 from ctypes import wintypes
 import sys
 import os
+import time
+
+import diagnostics
 
 user32 = ctypes.windll.user32
 dwmapi = ctypes.windll.dwmapi
+kernel32 = ctypes.windll.kernel32
+psapi = ctypes.windll.psapi
 
 class MONITORINFO(ctypes.Structure):
     _fields_ = [("cbSize", wintypes.DWORD), 
@@ -12,6 +17,21 @@ class MONITORINFO(ctypes.Structure):
                 ("rcWork", wintypes.RECT), 
                 ("dwFlags", wintypes.DWORD)]
 
+class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+    _fields_ = [("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t)]
+
+kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
     try:
@@ -23,22 +43,64 @@ def resource_path(relative_path):
 def apply_rounded_corners(hwnd):
     try: 
         dwmapi.DwmSetWindowAttribute(hwnd, 33, ctypes.byref(ctypes.c_int(2)), 4)
-    except: pass
+    except Exception: diagnostics.swallowed("window_utils.apply_rounded_corners")
 
 def set_no_focus(hwnd):
     """ Prevents window from stealing focus aggressively """
     try:
         style = user32.GetWindowLongW(hwnd, -20)
         user32.SetWindowLongW(hwnd, -20, style | 0x08000000 | 0x00000008)
-    except: pass
+    except Exception: diagnostics.swallowed("window_utils.set_no_focus")
 
 def get_monitor_info(hwnd):
+    started = time.perf_counter()
     try:
         h_mon = user32.MonitorFromWindow(hwnd, 2)
         mi = MONITORINFO()
         mi.cbSize = ctypes.sizeof(MONITORINFO)
         user32.GetMonitorInfoW(h_mon, ctypes.byref(mi))
+        diagnostics.slow("window_utils.get_monitor_info", started)
         return {'l': mi.rcMonitor.left, 't': mi.rcMonitor.top, 
                 'r': mi.rcMonitor.right, 'b': mi.rcMonitor.bottom}
-    except: 
-        return None
\ No newline at end of file
+    except Exception:
+        diagnostics.swallowed("window_utils.get_monitor_info")
+        return None
+
+def get_cursor_pos():
+    """ Pointer position in screen coordinates without a round trip through Tk (safe off the Tk thread). """
+    pt = wintypes.POINT()
+    try:
+        user32.GetCursorPos(ctypes.byref(pt))
+        return pt.x, pt.y
+    except Exception:
+        diagnostics.swallowed("window_utils.get_cursor_pos")
+        return None
+
+def get_foreground_window():
+    try: return user32.GetForegroundWindow()
+    except Exception:
+        diagnostics.swallowed("window_utils.get_foreground_window")
+        return None
+
+def set_foreground_window(hwnd):
+    if not hwnd: return
+    try: user32.SetForegroundWindow(hwnd)
+    except Exception: diagnostics.swallowed("window_utils.set_foreground_window")
+
+def is_remote_session():
+    """ True inside a Remote Desktop session (SM_REMOTESESSION). """
+    try: return bool(user32.GetSystemMetrics(0x1000))
+    except Exception:
+        diagnostics.swallowed("window_utils.is_remote_session")
+        return False
+
+def get_process_memory():
+    """ Working set (RSS) of this process in bytes. """
+    try:
+        pmc = PROCESS_MEMORY_COUNTERS()
+        pmc.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+        psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(pmc), pmc.cb)
+        return pmc.WorkingSetSize
+    except Exception:
+        diagnostics.swallowed("window_utils.get_process_memory")
+        return None
@@ -0,0 +1,177 @@
+import bisect
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+
+import diagnostics
+
+# --- Index File Layout ---
+# header | offsets[n+1] (uint32) | scores[n] (uint32) | prefix table | sorted utf-8 words
+# The prefix table holds the precomputed top words for every prefix of up to PREFIX_TABLE_LEN
+# characters, so the short prefixes with huge ranges never have to be scanned; longer prefixes
+# have small ranges and are ranked over their whole range.
+MAGIC = b'FPW2'
+HEADER = struct.Struct('<4s40sIII')  # magic, source sha1, word count, prefix entries, top-k
+PREFIX_ENTRY = struct.Struct('<4s3I')
+TOP_K = 3
+NO_WORD = 0xFFFFFFFF
+PREFIX_TABLE_LEN = 3
+
+def build_index(words_file, index_file):
+    """ Compiles a frequency-ordered word list (most common first) into the mmap-able index. """
+    with open(words_file, 'rb') as f: raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest().encode('ascii')
+    ranked, seen = [], set()
+    for line in raw.decode('utf-8').split():
+        w = line.strip().lower()
+        if w and w not in seen: seen.add(w); ranked.append(w)
+    n = len(ranked)
+    score_of = {w: n - i for i, w in enumerate(ranked)}
+    words = sorted(ranked)
+    blobs = [w.encode('utf-8') for w in words]
+    offsets = [0]
+    for b in blobs: offsets.append(offsets[-1] + len(b))
+
+    tops = {}
+    for i, w in enumerate(words):
+        for plen in range(1, PREFIX_TABLE_LEN + 1):
+            # The table stores prefixes in 4 bytes; longer (non-ASCII) ones fall back to ranking
+            if len(w) > plen and len(w[:plen].encode('utf-8')) <= 4: tops.setdefault(w[:plen], []).append((score_of[w], i))
+    prefix_rows = []
+    for prefix in sorted(tops):
+        best = [i for _, i in heapq.nlargest(TOP_K, tops[prefix])]
+        best += [NO_WORD] * (TOP_K - len(best))
+        prefix_rows.append(PREFIX_ENTRY.pack(prefix.encode('utf-8'), *best))
+
+    with open(index_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, digest, n, len(prefix_rows), TOP_K))
+        f.write(struct.pack(f'<{n + 1}I', *offsets))
+        f.write(struct.pack(f'<{n}I', *(score_of[w] for w in words)))
+        f.write(b''.join(prefix_rows))
+        f.write(b''.join(blobs))
+
+class WordIndex:
+    """ Read-only view over the mmapped index; word lookups never copy the whole file. """
+    def __init__(self, index_file):
+        self.file = open(index_file, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.digest, self.n, n_prefix, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC: raise ValueError(f"Not a word index: {index_file}")
+        view = memoryview(self.mm)
+        pos = HEADER.size
+        self.offsets = view[pos:pos + 4 * (self.n + 1)].cast('I'); pos += 4 * (self.n + 1)
+        self.scores = view[pos:pos + 4 * self.n].cast('I'); pos += 4 * self.n
+        self.prefix_top = {}
+        for _ in range(n_prefix):
+            prefix, *best = PREFIX_ENTRY.unpack_from(self.mm, pos); pos += PREFIX_ENTRY.size
+            self.prefix_top[prefix.rstrip(b'\0').decode('utf-8')] = tuple(i for i in best if i != NO_WORD)
+        self.blob = pos
+
+    @classmethod
+    def load(cls, words_file, index_file):
+        """ Opens the compiled index, rebuilding it when the word list's hash changed. """
+        with open(words_file, 'rb') as f: digest = hashlib.sha1(f.read()).hexdigest().encode('ascii')
+        if os.path.exists(index_file):
+            try:
+                index = cls(index_file)
+                if index.digest == digest: return index
+                index.close()
+            except Exception: diagnostics.swallowed("word_index.load")  # Corrupt index: rebuild it
+        build_index(words_file, index_file)
+        return cls(index_file)
+
+    def close(self):
+        self.offsets.release(); self.scores.release()
+        self.mm.close(); self.file.close()
+
+    def word_bytes(self, i):
+        return self.mm[self.blob + self.offsets[i]:self.blob + self.offsets[i + 1]]
+
+    def word(self, i): return self.word_bytes(i).decode('utf-8')
+
+    def narrow(self, lo, hi, prefix):
+        """ Shrinks [lo, hi) to the words starting with prefix; callers pass the previous range. """
+        p = prefix.encode('utf-8'); plen = len(p)
+        a, b = lo, hi
+        while a < b:
+            mid = (a + b) // 2
+            if self.word_bytes(mid)[:plen] < p: a = mid + 1
+            else: b = mid
+        start = a; b = hi
+        while a < b:
+            mid = (a + b) // 2
+            if self.word_bytes(mid)[:plen] <= p: a = mid + 1
+            else: b = mid
+        return start, a
+
+    def top(self, lo, hi, prefix, k=TOP_K):
+        if prefix in self.prefix_top: return [self.word(i) for i in self.prefix_top[prefix][:k]]
+        best = heapq.nlargest(k, range(lo, hi), key=self.scores.__getitem__)
+        return [self.word(i) for i in best]
+
+class Completer:
+    """ Tracks the word being typed and narrows the index range one character at a time. """
+    def __init__(self, index, learned=None, max_learned=500):
+        self.index = index
+        self.max_learned = max_learned
+        self.learned = dict(learned or {})
+        self.learned_sorted = sorted(self.learned)
+        self.typed = ""
+        self.ranges = [(0, index.n)]
+
+    def push(self, char):
+        self.typed += char
+        lo, hi = self.ranges[-1]
+        self.ranges.append(self.index.narrow(lo, hi, self.typed.lower()) if lo < hi else (lo, hi))
+
+    def pop(self):
+        if not self.typed: return
+        self.typed = self.typed[:-1]
+        self.ranges.pop()
+
+    def reset(self):
+        self.typed = ""
+        del self.ranges[1:]
+
+    def suggestions(self, k=TOP_K):
+        prefix = self.typed.lower()
+        if not prefix: return []
+        lo, hi = self.ranges[-1]
+        a = bisect.bisect_left(self.learned_sorted, prefix)
+        b = bisect.bisect_left(self.learned_sorted, prefix + '\uffff', a)
+        learned = sorted(self.learned_sorted[a:b], key=self.learned.__getitem__, reverse=True)
+        out = []
+        for w in learned + (self.index.top(lo, hi, prefix, k + 1) if lo < hi else []):
+            if w != prefix and w not in out: out.append(w)
+            if len(out) == k: break
+        if self.typed[0].isupper(): out = [w[0].upper() + w[1:] for w in out]
+        return out
+
+    def learn(self, word):
+        word = word.lower()
+        if len(word) < 2 or not word.isalpha(): return
+        if word not in self.learned:
+            if len(self.learned) >= self.max_learned:
+                weakest = min(self.learned, key=self.learned.__getitem__)
+                del self.learned[weakest]
+                self.learned_sorted.pop(bisect.bisect_left(self.learned_sorted, weakest))
+            bisect.insort(self.learned_sorted, word)
+            self.learned[word] = 0
+        self.learned[word] += 1
+
+    def commit(self):
+        """ The current word was finished by space/punctuation. Only accepted suggestions are learned,
+        so a typo typed out in full never outranks the index. """
+        self.reset()
+
+    def accept(self, i):
+        """ Returns the characters still missing for suggestion i and learns the word. """
+        options = self.suggestions()
+        if i >= len(options): return ""
+        word = options[i]
+        rest = word[len(self.typed):]
+        self.learn(word)
+        self.reset()
+        return rest